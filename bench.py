@@ -0,0 +1,320 @@
+"""Benchmark the GUI's data paths against a seeded SQLite stand-in for MySQL.
+
+    python bench.py --transactions 1000000 --json results.json
+    python bench.py --compare results.json        # later, on another version
+
+Each scenario (load_dashboard, load_users, view_transactions, run_risk) is
+timed end to end: from the button's handler to the result being on
+screen, Treeview rows and figure redraw included. Every scenario runs
+with the query cache cleared ("db") and again with it warm ("cache").
+
+"gui" mode drives a real PortfolioApp and needs a display (use xvfb-run
+on a headless machine). "data" mode needs none: it times the worker side
+plus the dashboard and risk figure rendering on an Agg canvas, but no
+Treeview population. "auto" picks gui when a display is available.
+Results are written as JSON so runs from different versions can be
+compared with --compare.
+
+The memory footprint of the largest results (every holding with its
+owner, the whole transaction history, the target price history) is measured too: a list of row tuples, values included, against
+the same rows in a columnar.ColumnarResult. SQLite returns floats where
+MySQL returns Decimal objects, so the tuple sizes here are a lower bound.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+import bench_db
+import snapshots
+from columnar import ColumnarResult, tuple_rows_nbytes
+
+SCENARIOS = ("load_dashboard", "load_users", "view_transactions", "run_risk")
+
+
+# =========================
+# TARGETS
+# =========================
+
+def pick_targets(g):
+    """The largest price history (portfolio, ticker) and the user with the most holdings."""
+    with g.POOL.connection() as conn:
+        cur = conn.cursor()
+        # seed() puts the big price histories in portfolio 1
+        cur.execute("SELECT portfolioID, tickerSymbol, COUNT(*) AS n FROM TransactionRecord "
+                    "WHERE portfolioID = 1 GROUP BY portfolioID, tickerSymbol "
+                    "ORDER BY n DESC LIMIT 1")
+        pid, ticker, trades = cur.fetchall()[0]
+        cur.execute("SELECT p.userID, COUNT(*) AS n FROM Holding h "
+                    "JOIN Portfolio p ON p.portfolioID = h.portfolioID "
+                    "GROUP BY p.userID ORDER BY n DESC LIMIT 1")
+        uid, holdings = cur.fetchall()[0]
+        cur.close()
+    return {"portfolio": pid, "ticker": ticker, "price_points": trades,
+            "user": uid, "user_holdings": holdings}
+
+
+# =========================
+# MEMORY FOOTPRINT
+# =========================
+
+def measure_memory(g, targets):
+    """Bytes held by the big results as row tuples and as ColumnarResults."""
+    from dashboard_data import price_history_query
+
+    queries = {
+        "holdings": ("SELECT p.userID, h.tickerSymbol, h.marketValue FROM Holding h "
+                     "JOIN Portfolio p ON p.portfolioID = h.portfolioID", ()),
+        "transactions": (g.TRANSACTIONS_QUERY.select_sql, ()),
+        "price_history": price_history_query(targets["portfolio"], targets["ticker"]),
+    }
+    out = {}
+    with g.POOL.connection() as conn:
+        cur = conn.cursor()
+        for name, (sql, params) in queries.items():
+            cur.execute(sql, params)
+            cols = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+            chunk = g.STREAM_CHUNK_SIZE
+            result = ColumnarResult.from_chunks(
+                cols, (rows[i:i + chunk] for i in range(0, len(rows), chunk)))
+            out[name] = {"rows": len(rows), "tuple_bytes": tuple_rows_nbytes(rows),
+                         "columnar_bytes": result.nbytes}
+        cur.close()
+    return out
+
+
+def print_memory(memory, file=sys.stdout):
+    print(f"{'result':<20}{'rows':>10}{'tuples MB':>12}{'columnar MB':>13}{'ratio':>8}", file=file)
+    for name, m in memory.items():
+        ratio = m["tuple_bytes"] / m["columnar_bytes"] if m["columnar_bytes"] else 0
+        print(f"{name:<20}{m['rows']:>10,}{m['tuple_bytes'] / 2 ** 20:>12.1f}"
+              f"{m['columnar_bytes'] / 2 ** 20:>13.1f}{ratio:>7.1f}x", file=file)
+
+
+# =========================
+# GUI MODE
+# =========================
+
+class GuiBench:
+    """Drives a real PortfolioApp through its button handlers."""
+
+    def __init__(self, g, targets):
+        self.g = g
+        for name in ("showinfo", "showwarning", "showerror"):
+            setattr(g.messagebox, name, lambda *a, **k: None)
+        # a journal of its own, never the user's
+        self._journal_dir = tempfile.mkdtemp(prefix="portfolio_bench_")
+        g.WRITE_BEHIND_JOURNAL = os.path.join(self._journal_dir, "transactions.journal")
+        self.app = app = g.PortfolioApp()
+        # deliver results as soon as they are ready instead of on the 25 ms poll
+        app.jobs.poll_ms = 1
+        app.update()
+        self.startup_ms = app.startup_ms
+        for tab in app.notebook.tabs():  # build every tab before timing
+            app.notebook.select(tab)
+            app.update()
+        self._wait_all()
+
+        app.ent_dash_portfolio.insert(0, str(targets["portfolio"]))
+        app.ent_dash_ticker.insert(0, targets["ticker"])
+        app.ent_risk_user.insert(0, str(targets["user"]))
+        self.actions = {
+            "load_dashboard": ("dashboard", app.load_dashboard),
+            "load_users": ("users", app.load_users),
+            "view_transactions": ("transactions", app.view_transactions),
+            "run_risk": ("risk", app.run_risk),
+        }
+
+    def run(self, scenario):
+        tab, action = self.actions[scenario]
+        t0 = time.perf_counter()
+        action()
+        while self.app.jobs.busy(tab):
+            self.app.update()
+            time.sleep(0.0005)  # don't starve the worker threads of the GIL
+        self.app.update()  # idle tasks: geometry and draw_idle() redraws
+        return (time.perf_counter() - t0) * 1000
+
+    def _wait_all(self):
+        while any(self.app.jobs.busy(t) for t in ("users", "portfolios", "transactions")):
+            self.app.update()
+            time.sleep(0.0005)
+
+    def close(self):
+        self.app._on_close()
+        shutil.rmtree(self._journal_dir, ignore_errors=True)
+
+
+# =========================
+# DATA MODE
+# =========================
+
+class DataBench:
+    """Worker-side fetches plus the real render methods drawing on Agg canvases."""
+
+    def __init__(self, g, targets):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from charts import ChartPanel, DashboardFigure, PieChart
+
+        self.g = g
+        self.targets = targets
+        self.startup_ms = None
+        quiet = types.SimpleNamespace(config=lambda **k: None)
+
+        # stands in for the app: the render methods only need these attributes
+        self.view = view = types.SimpleNamespace(lbl_dash_summary=quiet, tree_risk=None,
+                                                 _fill_tree=lambda *a: None,
+                                                 _start_snapshot_timer=lambda: None)
+        fig = Figure(figsize=(9, 5), dpi=100)
+        view.dash_fig = DashboardFigure(fig, g.PRICE_MARKER_LIMIT)
+        view.panel_dash = ChartPanel(fig, FigureCanvasAgg(fig))
+
+        fig = Figure(figsize=(8, 4), dpi=100)
+        view.chart_actual = PieChart(fig.add_subplot(121), "Actual Allocation by Risk Category")
+        view.chart_ideal = PieChart(fig.add_subplot(122), "Ideal Allocation by Risk Category")
+        view.panel_risk = ChartPanel(fig, FigureCanvasAgg(fig))
+
+    def run(self, scenario):
+        g, t, app = self.g, self.targets, self.g.PortfolioApp
+        t0 = time.perf_counter()
+        if scenario == "load_dashboard":
+            app._render_dashboard(self.view, app._fetch_dashboard(t["portfolio"], t["ticker"]))
+        elif scenario == "load_users":
+            g.fetch_all(*g.USERS_QUERY.page(None, g.PAGE_SIZE),
+                        ttl=g.CACHE_TTL["users"], tags=[("table", "UserProfile")])
+        elif scenario == "view_transactions":
+            g.fetch_all(*g.TRANSACTIONS_QUERY.page(None, g.PAGE_SIZE),
+                        ttl=g.CACHE_TTL["transactions"], tags=[("table", "TransactionRecord")])
+        elif scenario == "run_risk":
+            app._render_risk(self.view, g.fetch_risk(t["user"]))
+        return (time.perf_counter() - t0) * 1000
+
+    def close(self):
+        pass
+
+
+def display_available():
+    import tkinter
+    try:
+        tkinter.Tk().destroy()
+        return True
+    except tkinter.TclError:
+        return False
+
+
+# =========================
+# REPORTING
+# =========================
+
+def summarize(samples):
+    s = sorted(samples)
+    return {"runs": len(s), "min_ms": round(s[0], 3), "median_ms": round(statistics.median(s), 3),
+            "mean_ms": round(statistics.fmean(s), 3), "max_ms": round(s[-1], 3),
+            "samples_ms": [round(x, 3) for x in samples]}
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_table(report, baseline=None, file=sys.stdout):
+    print(f"{report['mode']} mode, {report['transactions']:,} transactions, "
+          f"{report['repeat']} runs, revision {report['revision']}", file=file)
+    header = f"{'scenario':<20}{'phase':<8}{'median ms':>12}{'min ms':>10}{'max ms':>10}"
+    if baseline:
+        header += f"{'baseline':>12}{'change':>9}"
+    print(header, file=file)
+    for name, phases in report["results"].items():
+        for phase, r in phases.items():
+            line = f"{name:<20}{phase:<8}{r['median_ms']:>12.1f}{r['min_ms']:>10.1f}{r['max_ms']:>10.1f}"
+            old = (baseline or {}).get("results", {}).get(name, {}).get(phase)
+            if old:
+                line += f"{old['median_ms']:>12.1f}{r['median_ms'] / old['median_ms'] - 1:>+9.0%}"
+            print(line, file=file)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--transactions", type=int, default=200_000,
+                    help="scale factor: rows in TransactionRecord (default 200000)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--db", help="SQLite file to use/create (default: a cached one in the temp dir)")
+    ap.add_argument("--rebuild", action="store_true", help="re-seed even if the database exists")
+    ap.add_argument("--repeat", type=int, default=5, help="runs per scenario and phase")
+    ap.add_argument("--mode", choices=("auto", "gui", "data"), default="auto")
+    ap.add_argument("--scenario", action="append", choices=SCENARIOS,
+                    help="run only this scenario (repeatable)")
+    ap.add_argument("--json", help="write the results to this file")
+    ap.add_argument("--compare", help="a previous --json file to compare against")
+    args = ap.parse_args(argv)
+
+    path = bench_db.seeded_database(args.transactions, args.seed, args.db, args.rebuild)
+    bench_db.install(path)
+    import portfolio_gui as g
+
+    mode = args.mode
+    if mode == "auto":
+        mode = "gui" if display_available() else "data"
+    with g.POOL.connection() as conn:  # the admin step, once per database
+        if not snapshots.is_built(conn):
+            snapshots.install(conn, reinstall=True)
+            snapshots.build_snapshots(conn, batch_size=g.IMPORT_BATCH_SIZE)
+    targets = pick_targets(g)
+    memory = measure_memory(g, targets)
+    bench = GuiBench(g, targets) if mode == "gui" else DataBench(g, targets)
+
+    results = {}
+    try:
+        for name in args.scenario or SCENARIOS:
+            db, cached = [], []
+            for _ in range(args.repeat):
+                g.CACHE.clear()
+                db.append(bench.run(name))
+                cached.append(bench.run(name))
+            results[name] = {"db": summarize(db), "cache": summarize(cached)}
+    finally:
+        bench.close()
+
+    report = {
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mode": mode,
+        "transactions": args.transactions,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "targets": targets,
+        "startup_ms": bench.startup_ms,
+        "results": results,
+        "memory": memory,
+        "queries": g.STATS.summary(),
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+    print()
+    print_memory(memory)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+import types
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+
+# =========================
+# SQLITE STAND-IN FOR MYSQL
+# =========================
+# A tiny mysql.connector look-alike over SQLite, covering exactly what the
+# app uses: connect(), cursors with execute/executemany/fetch*, multi-
+# statement batches with nextset() (CALLs included), callproc()/stored_results(),
+# KILL QUERY and the error classes. install() puts it in sys.modules, so it must run before
+# portfolio_gui (or db_pool / tx_import) is imported. Only for benchmarks.
+
+class Error(Exception):
+    def __init__(self, msg=None, errno=None):
+        super().__init__(msg)
+        self.msg = msg
+        self.errno = errno
+
+
+class InterfaceError(Error): pass
+class DatabaseError(Error): pass
+class PoolError(Error): pass
+class OperationalError(DatabaseError): pass
+class ProgrammingError(DatabaseError): pass
+class IntegrityError(DatabaseError): pass
+class DataError(DatabaseError): pass
+
+
+def _translate_error(e):
+    if isinstance(e, sqlite3.IntegrityError):
+        return IntegrityError(str(e), 1062)
+    if isinstance(e, sqlite3.OperationalError):
+        if str(e) == "interrupted":
+            return OperationalError("Query execution was interrupted", 1317)
+        if str(e).startswith("no such table"):
+            return ProgrammingError(str(e), 1146)
+        if str(e).startswith("no such column"):
+            return ProgrammingError(str(e), 1054)
+        return OperationalError(str(e))
+    return DatabaseError(str(e))
+
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter("DATE", lambda b: date.fromisoformat(b.decode()))
+
+_PLACEHOLDER = re.compile(r"%s")
+# MySQL's single-statement trigger body becomes a BEGIN ... END block
+_TRIGGER_BODY = re.compile(r"(CREATE\s+TRIGGER\s.*?\sFOR\s+EACH\s+ROW\s+)(.*)$",
+                           re.IGNORECASE | re.DOTALL)
+_KILL_QUERY = re.compile(r"\s*KILL\s+QUERY\s+(\d+)\s*$", re.IGNORECASE)
+_CALL = re.compile(r"\s*CALL\s+(\w+)\s*\(", re.IGNORECASE)
+
+# GetRiskAnalysis(userID): share of the user's market value per risk
+# category next to the model's ideal share. The real procedure's body is not
+# in this repo; Investment.riskCategory and RiskModel below only exist to
+# back this stand-in, nothing outside bench_db may query them
+RISK_ANALYSIS_SQL = """
+SELECT i.riskCategory AS modelRiskCategory,
+       SUM(h.marketValue) * 100.0 / (SELECT SUM(h2.marketValue)
+                                     FROM Holding h2 JOIN Portfolio p2 ON p2.portfolioID = h2.portfolioID
+                                     WHERE p2.userID = ?) AS actualPct,
+       r.idealPct AS idealPct
+FROM Holding h
+JOIN Portfolio p ON p.portfolioID = h.portfolioID
+JOIN Investment i ON i.tickerSymbol = h.tickerSymbol
+JOIN RiskModel r ON r.modelRiskCategory = i.riskCategory
+WHERE p.userID = ?
+GROUP BY i.riskCategory, r.idealPct
+ORDER BY i.riskCategory
+"""
+
+PROCEDURES = {
+    "GetRiskAnalysis": lambda args: (RISK_ANALYSIS_SQL, (args[0], args[0])),
+}
+
+
+def _procedure(name, args):
+    """(sql, params) standing in for CALL name(args)."""
+    try:
+        return PROCEDURES[name](tuple(args))
+    except KeyError:
+        raise ProgrammingError(f"PROCEDURE {name} does not exist", 1305)
+
+
+class _Result:
+    """One result set of a callproc(), like mysql-connector's stored_results() items."""
+
+    def __init__(self, cur):
+        self._cur = cur
+        self.description = cur.description
+        self.with_rows = cur.description is not None
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size=1):
+        return self._cur.fetchmany(size)
+
+
+class Cursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._cur = conn._db.cursor()
+        self._pending = []   # statements of a multi-statement batch not run yet
+        self._stored = []
+        self.description = None
+        self.rowcount = -1
+        self.with_rows = False
+
+    def execute(self, sql, params=()):
+        kill = _KILL_QUERY.match(sql)
+        if kill:
+            # interrupts whatever the other connection is running, like MySQL's
+            target = Connection._by_id.get(int(kill.group(1)))
+            if target is None:
+                raise OperationalError(f"Unknown thread id: {kill.group(1)}", 1094)
+            target._db.interrupt()
+            self.description, self.rowcount, self.with_rows = None, 0, False
+            return
+        params = tuple(params or ())
+        statements = [q for q in sql.split(";") if q.strip()]
+        self._pending = []
+        for q in statements:
+            n = len(_PLACEHOLDER.findall(q))
+            call = _CALL.match(q)
+            if call:
+                # like MySQL: the procedure's result set, then the CALL's own status
+                self._pending.append(_procedure(call.group(1), params[:n]))
+                self._pending.append((None, ()))
+            else:
+                self._pending.append((q, params[:n]))
+            params = params[n:]
+        self._run_next()
+
+    def executemany(self, sql, seq_params):
+        try:
+            self._conn._begin_implicit()
+            self._cur.executemany(self._sql(sql), [tuple(p) for p in seq_params])
+        except sqlite3.Error as e:
+            raise _translate_error(e)
+        self.rowcount = self._cur.rowcount
+
+    def nextset(self):
+        if not self._pending:
+            return None
+        self._run_next()
+        return True
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size=1):
+        return self._cur.fetchmany(size)
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def callproc(self, name, args=()):
+        sql, params = _procedure(name, args)
+        cur = self._conn._db.cursor()
+        try:
+            cur.execute(sql, params)
+        except sqlite3.Error as e:
+            raise _translate_error(e)
+        self._stored = [_Result(cur)]
+        return args
+
+    def stored_results(self):
+        return iter(self._stored)
+
+    def close(self):
+        self._cur.close()
+
+    @staticmethod
+    def _sql(sql):
+        sql = (_PLACEHOLDER.sub("?", sql).replace("CURDATE()", "date('now')")
+               .replace("INSERT IGNORE", "INSERT OR IGNORE").replace(" FOR UPDATE", "")
+               .replace("BIGINT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT"))
+        return _TRIGGER_BODY.sub(r"\1BEGIN \2; END", sql)
+
+    def _run_next(self):
+        q, params = self._pending.pop(0)
+        if q is None:  # a CALL's status: no result set
+            self.description, self.rowcount, self.with_rows = None, 0, False
+            return
+        try:
+            if not q.lstrip().upper().startswith("SELECT"):
+                self._conn._begin_implicit()
+            self._cur.execute(self._sql(q), params)
+        except sqlite3.Error as e:
+            raise _translate_error(e)
+        self.description = self._cur.description
+        self.with_rows = self.description is not None
+        self.rowcount = self._cur.rowcount
+
+
+class Connection:
+    _by_id = {}   # connection_id -> open Connection, for KILL QUERY
+    _next_id = 1
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                   detect_types=sqlite3.PARSE_DECLTYPES)
+        self._db.execute("PRAGMA busy_timeout = 10000")
+        self.autocommit = True
+        self.connection_id = Connection._next_id
+        Connection._next_id += 1
+        Connection._by_id[self.connection_id] = self
+
+    def cursor(self, buffered=None, **_):
+        return Cursor(self)
+
+    @property
+    def in_transaction(self):
+        return self._db.in_transaction
+
+    def start_transaction(self):
+        if not self._db.in_transaction:
+            self._db.execute("BEGIN")
+
+    def _begin_implicit(self):
+        # without autocommit, writes open a transaction like InnoDB's
+        if not self.autocommit:
+            self.start_transaction()
+
+    def commit(self):
+        if self._db.in_transaction:
+            self._db.execute("COMMIT")
+
+    def rollback(self):
+        if self._db.in_transaction:
+            self._db.execute("ROLLBACK")
+
+    def ping(self, reconnect=False, **_):
+        self._db.execute("SELECT 1")
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        Connection._by_id.pop(self.connection_id, None)
+        self._db.close()
+
+
+def install(database):
+    """Register the stand-in as `mysql.connector`; every connect() opens `database`."""
+    errors = types.ModuleType("mysql.connector.errors")
+    connector = types.ModuleType("mysql.connector")
+    for cls in (Error, InterfaceError, DatabaseError, PoolError, OperationalError,
+                ProgrammingError, IntegrityError, DataError):
+        setattr(errors, cls.__name__, cls)
+        setattr(connector, cls.__name__, cls)
+    connector.errors = errors
+    connector.connect = lambda **config: Connection(database)  # host/user/... are ignored
+    mysql = types.ModuleType("mysql")
+    mysql.connector = connector
+    sys.modules.update({"mysql": mysql, "mysql.connector": connector,
+                        "mysql.connector.errors": errors})
+
+
+# =========================
+# SCHEMA AND SEED DATA
+# =========================
+
+SCHEMA = """
+CREATE TABLE UserProfile (
+    userID INTEGER PRIMARY KEY, password TEXT, fName TEXT, lName TEXT, dateOfBirth DATE);
+CREATE TABLE Portfolio (
+    portfolioID INTEGER PRIMARY KEY, baseCurrency TEXT,
+    userID INTEGER REFERENCES UserProfile(userID) ON DELETE CASCADE);
+CREATE TABLE Investment (
+    tickerSymbol TEXT PRIMARY KEY, sector TEXT, region TEXT, investmentType TEXT, riskCategory TEXT);
+CREATE TABLE RiskModel (modelRiskCategory TEXT PRIMARY KEY, idealPct REAL);
+CREATE TABLE TransactionRecord (
+    transactionID INTEGER PRIMARY KEY,
+    portfolioID INTEGER REFERENCES Portfolio(portfolioID) ON DELETE CASCADE,
+    tickerSymbol TEXT, investmentType TEXT,
+    marketPricePerShare REAL, salePricePerShare REAL, quantity REAL, transactionDate DATE);
+CREATE INDEX ix_tx_date ON TransactionRecord (transactionDate, transactionID);
+CREATE INDEX ix_tx_portfolio ON TransactionRecord (portfolioID, tickerSymbol, transactionDate);
+CREATE TABLE Holding (
+    portfolioID INTEGER, tickerSymbol TEXT, quantityOwned REAL, bookCost REAL, marketValue REAL,
+    PRIMARY KEY (portfolioID, tickerSymbol));
+CREATE VIEW UserDefinedHoldingPerformance AS
+SELECT portfolioID, tickerSymbol, quantityOwned, bookCost, marketValue,
+       marketValue - bookCost AS profitAndLoss,
+       CASE WHEN bookCost <> 0 THEN (marketValue - bookCost) * 100.0 / bookCost END AS percentGain
+FROM Holding;
+"""
+
+RISK_MODEL = {"Low": 40.0, "Medium": 35.0, "High": 25.0}
+FIRST_DATE = date(2015, 1, 2)
+DAYS = 3650
+
+
+def seed(path, transactions, seed=1):
+    """Create a database with `transactions` trades and proportionally many users and portfolios.
+
+    Portfolio 1 gets a fifth of all trades, spread over five tickers, so
+    the dashboard has one large price history to draw.
+    """
+    rnd = random.Random(seed)
+    n_users = max(transactions // 200, 10)
+    n_portfolios = n_users * 2
+    tickers = [f"T{i:03d}" for i in range(60)]
+    prices = {t: rnd.uniform(10, 500) for t in tickers}
+
+    db = sqlite3.connect(path, isolation_level=None)
+    db.executescript("PRAGMA journal_mode = WAL; PRAGMA synchronous = OFF;" + SCHEMA)
+    db.execute("BEGIN")
+    db.executemany("INSERT INTO RiskModel VALUES (?, ?)", RISK_MODEL.items())
+    db.executemany("INSERT INTO Investment VALUES (?, ?, ?, ?, ?)",
+                   [(t, f"Sector{i % 11}", ("NA", "EU", "APAC")[i % 3],
+                     ("Stock", "ETF", "Bond")[i % 3], list(RISK_MODEL)[i % 3])
+                    for i, t in enumerate(tickers)])
+    db.executemany("INSERT INTO UserProfile VALUES (?, ?, ?, ?, ?)",
+                   ((u, "x", f"First{u}", f"Last{u}",
+                     (date(1950, 1, 1) + timedelta(days=rnd.randrange(20000))).isoformat())
+                    for u in range(1, n_users + 1)))
+    db.executemany("INSERT INTO Portfolio VALUES (?, ?, ?)",
+                   ((p, ("CAD", "USD")[p % 2], (p - 1) % n_users + 1)
+                    for p in range(1, n_portfolios + 1)))
+
+    def trades():
+        for tid in range(1, transactions + 1):
+            if tid % 5 == 0:
+                pid, ticker = 1, tickers[tid // 5 % 5]
+            else:
+                pid, ticker = rnd.randrange(2, n_portfolios + 1), rnd.choice(tickers)
+            day = FIRST_DATE + timedelta(days=rnd.randrange(DAYS))
+            price = round(prices[ticker] * (0.5 + (day - FIRST_DATE).days / DAYS)
+                          * rnd.uniform(0.95, 1.05), 2)
+            qty = rnd.choice((1, 5, 10, 25, 50, 100))
+            sale = price if rnd.random() < 0.2 else None
+            yield tid, pid, ticker, "Stock", price, sale, qty, day.isoformat()
+
+    db.executemany("INSERT INTO TransactionRecord VALUES (?, ?, ?, ?, ?, ?, ?, ?)", trades())
+    # holdings from the buys (no sale price), valued at the highest traded price
+    db.execute("""
+        INSERT INTO Holding
+        SELECT portfolioID, tickerSymbol, SUM(quantity), SUM(quantity * marketPricePerShare),
+               SUM(quantity) * MAX(marketPricePerShare)
+        FROM TransactionRecord WHERE salePricePerShare IS NULL
+        GROUP BY portfolioID, tickerSymbol""")
+    db.execute("COMMIT")
+    db.execute("ANALYZE")
+    db.close()
+
+
+def seeded_database(transactions, seed_value=1, path=None, rebuild=False):
+    """Path of a seeded database, reusing one built earlier for the same scale."""
+    if path is None:
+        folder = os.path.join(tempfile.gettempdir(), "portfolio_bench")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"tx{transactions}_seed{seed_value}.sqlite")
+    if rebuild or not os.path.exists(path):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        t0 = time.perf_counter()
+        seed(path + ".tmp", transactions, seed_value)
+        os.replace(path + ".tmp", path)
+        print(f"seeded {transactions:,} transactions in {time.perf_counter() - t0:.1f}s: {path}",
+              file=sys.stderr)
+    return path
@@ -0,0 +1,314 @@
+import time
+
+import matplotlib as mpl
+import numpy as np
+from matplotlib import dates as mdates
+from matplotlib.patches import Wedge
+
+
+# =========================
+# DOWNSAMPLING
+# =========================
+
+def minmax_downsample(x, y, n_buckets):
+    """Indices of the points worth drawing for a line `n_buckets` pixels wide.
+
+    x must be sorted. The x range is split into n_buckets equal-width
+    buckets and the first, last, lowest and highest point of each is kept
+    (M4 bucketing), so spikes and the overall envelope render exactly as
+    with every point. Returns indices in x order.
+    """
+    n = len(x)
+    if n <= 4 * n_buckets:
+        return np.arange(n)
+    bounds = np.linspace(x[0], x[-1], n_buckets + 1)[:-1]
+    starts = np.unique(np.searchsorted(x, bounds, side="left"))  # empty buckets collapse
+    ends = np.append(starts[1:], n)
+    lows = _first_match(y, np.minimum.reduceat(y, starts), starts, ends)
+    highs = _first_match(y, np.maximum.reduceat(y, starts), starts, ends)
+    return np.unique(np.concatenate([starts, ends - 1, lows, highs]))
+
+
+def _first_match(y, per_bucket, starts, ends):
+    """Index of the first y equal to its bucket's value in `per_bucket` (an O(n) argmin/argmax)."""
+    hits = np.flatnonzero(y == np.repeat(per_bucket, ends - starts))
+    return hits[np.searchsorted(hits, starts)]
+
+
+# =========================
+# IN-PLACE CHARTS
+# =========================
+# The chart classes below create their artists once and afterwards only
+# change their data (bar heights, wedge angles, line vertices), so a
+# refresh costs a redraw, not a rebuild of the axes.
+
+class ChartPanel:
+    """A figure on a canvas that is laid out once and redrawn with draw_idle().
+
+    tight_layout is expensive (it measures every tick label), so it only
+    runs on the first redraw or when a chart first gets data; later
+    refreshes just move artists and redraw. Blitting is not used because
+    nearly every refresh changes axis limits and tick labels too.
+
+    Every actual draw is timed; `on_draw(ms)` is called after each one and
+    stats() reports the totals.
+    """
+
+    def __init__(self, fig, canvas, on_draw=None):
+        self.fig = fig
+        self.canvas = canvas
+        self.on_draw = on_draw
+        self.draws = 0
+        self.total_ms = 0.0
+        self.last_ms = None
+        self._laid_out = False
+
+        draw = canvas.draw
+
+        def timed_draw(*args, **kwargs):
+            t0 = time.perf_counter()
+            draw(*args, **kwargs)
+            self._record((time.perf_counter() - t0) * 1000)
+        # draw_idle() ends up calling canvas.draw(), so this times every redraw
+        canvas.draw = timed_draw
+
+    def redraw(self, relayout=False):
+        """Schedule a redraw; tight_layout runs only the first time or when asked."""
+        if relayout or not self._laid_out:
+            self.fig.tight_layout()
+            self._laid_out = True
+        self.canvas.draw_idle()
+
+    def stats(self):
+        return {"draws": self.draws, "last_ms": self.last_ms,
+                "avg_ms": self.total_ms / self.draws if self.draws else None}
+
+    def _record(self, ms):
+        self.draws += 1
+        self.total_ms += ms
+        self.last_ms = ms
+        if self.on_draw:
+            self.on_draw(ms)
+
+
+class _Chart:
+    def __init__(self, ax, title=""):
+        self.ax = ax
+        ax.set_title(title)
+        self.message = ax.text(0.5, 0.5, "", transform=ax.transAxes,
+                               ha="center", va="center", color="white", visible=False)
+
+    def show_message(self, text):
+        self.message.set_text(text)
+        self.message.set_visible(bool(text))
+
+
+class BarChart(_Chart):
+    """Bar chart whose bars are resized in place; bars are only rebuilt when their count changes."""
+
+    def __init__(self, ax, title=""):
+        super().__init__(ax, title)
+        self.bars = []
+        self.labels = []
+
+    def update(self, labels, values):
+        """Show values; returns True if the chart was empty before (layout should be computed)."""
+        labels = list(labels)
+        values = np.asarray(values, dtype=float)
+        self.show_message("")
+        first = not self.bars
+        if len(self.bars) != len(values):
+            for b in self.bars:
+                b.remove()
+            self.bars = list(self.ax.bar(np.arange(len(values)), values))
+        else:
+            for b, v in zip(self.bars, values):
+                b.set_height(v)
+        if labels != self.labels:
+            self.ax.set_xticks(np.arange(len(labels)), labels, rotation=45, ha="right")
+            self.labels = labels
+        lo, hi = min(values.min(), 0.0), max(values.max(), 0.0)
+        pad = (hi - lo) * 0.05 or 1.0
+        self.ax.set_ylim(lo - pad, hi + pad)
+        self.ax.set_xlim(-0.5, len(values) - 0.5)
+        return first
+
+    def clear(self, message=""):
+        for b in self.bars:
+            b.remove()
+        self.bars = []
+        self.labels = []
+        self.ax.set_xticks([])
+        self.show_message(message)
+
+
+class PieChart(_Chart):
+    """Pie chart whose wedges, labels and percentages are moved in place when the sizes change."""
+
+    LABEL_DISTANCE = 1.1
+    PCT_DISTANCE = 0.6
+
+    def __init__(self, ax, title=""):
+        super().__init__(ax, title)
+        ax.set(frame_on=False, xticks=[], yticks=[],
+               xlim=(-1.25, 1.25), ylim=(-1.25, 1.25), aspect="equal")
+        self.wedges = []
+        self.texts = []
+        self.pct_texts = []
+
+    def update(self, labels, values):
+        """Show values; returns True if the chart was empty before (layout should be computed)."""
+        values = np.asarray(values, dtype=float)
+        total = values.sum()
+        if total <= 0:
+            self.clear("Nothing to show.")
+            return False
+        self.show_message("")
+        first = not self.wedges
+        if len(self.wedges) != len(values):
+            self._build(len(values))
+
+        fracs = values / total
+        bounds = np.concatenate([[0.0], np.cumsum(fracs)]) * 360.0
+        for i, (w, t, p) in enumerate(zip(self.wedges, self.texts, self.pct_texts)):
+            theta1, theta2 = bounds[i], bounds[i + 1]
+            w.set_theta1(theta1)
+            w.set_theta2(theta2)
+            mid = np.deg2rad((theta1 + theta2) / 2)
+            x, y = np.cos(mid), np.sin(mid)
+            t.set_position((self.LABEL_DISTANCE * x, self.LABEL_DISTANCE * y))
+            t.set_horizontalalignment("left" if x > 0 else "right")
+            t.set_text(labels[i])
+            p.set_position((self.PCT_DISTANCE * x, self.PCT_DISTANCE * y))
+            p.set_text(f"{100 * fracs[i]:.1f}%")
+        return first
+
+    def clear(self, message=""):
+        self._build(0)
+        self.show_message(message)
+
+    def _build(self, n):
+        for artist in self.wedges + self.texts + self.pct_texts:
+            artist.remove()
+        colors = mpl.rcParams["axes.prop_cycle"].by_key()["color"]
+        self.wedges = [self.ax.add_patch(Wedge((0, 0), 1, 0, 0, facecolor=colors[i % len(colors)],
+                                               clip_on=False))
+                       for i in range(n)]
+        self.texts = [self.ax.text(0, 0, "", va="center") for _ in range(n)]
+        self.pct_texts = [self.ax.text(0, 0, "", ha="center", va="center") for _ in range(n)]
+
+
+class DownsampledLine(_Chart):
+    """Line over a long, x-sorted date series, re-sampled to the axis width on every x-limit change.
+
+    The full series is kept; zooming in shows it at full resolution, and
+    markers are only drawn once few enough points are visible.
+    """
+
+    def __init__(self, ax, title="", marker_limit=200, drawstyle="default"):
+        super().__init__(ax, title)
+        self.marker_limit = marker_limit
+        self.line, = ax.plot([], [], drawstyle=drawstyle)
+        self.x = self.y = None
+        self._setting = False  # set_series() is changing the limits; its caller redraws
+        ax.xaxis_date()
+        ax.callbacks.connect("xlim_changed", self._on_xlim)
+
+    def set_series(self, x, y, title=None):
+        """x: matplotlib date numbers, y: values; both NumPy arrays sorted by x."""
+        self.x, self.y = x, y
+        self.show_message("")
+        if title is not None:
+            self.ax.set_title(title)
+        pad = (y.max() - y.min()) * 0.05 or 1.0
+        self.ax.set_ylim(y.min() - pad, y.max() + pad)
+        self._setting = True
+        try:
+            self.ax.set_xlim(x[0] - 0.5, x[-1] + 0.5)  # fires _on_xlim, which fills the line
+        finally:
+            self._setting = False
+
+    def clear(self, message=""):
+        self.x = self.y = None
+        self.line.set_data([], [])
+        self.show_message(message)
+
+    def _on_xlim(self, ax):
+        if self.x is None:
+            return
+        lo, hi = ax.get_xlim()
+        # one point either side keeps the line running off the plot edges
+        i = max(np.searchsorted(self.x, lo, side="left") - 1, 0)
+        j = min(np.searchsorted(self.x, hi, side="right") + 1, len(self.x))
+        width = max(int(ax.get_window_extent().width), 1)
+        idx = i + minmax_downsample(self.x[i:j], self.y[i:j], width)
+        self.line.set_data(self.x[idx], self.y[idx])
+        self.line.set_marker("o" if len(idx) <= self.marker_limit else "")
+        if not self._setting:  # zoom / pan: nobody else will redraw
+            ax.figure.canvas.draw_idle()
+
+
+# =========================
+# DASHBOARD FIGURE
+# =========================
+
+class DashboardFigure:
+    """The dashboard's allocation pie, P/L bars, value history and price history on one figure.
+
+    The GUI's Dashboard tab and the batch reports both draw through this,
+    so the charts look the same in either place.
+    """
+
+    def __init__(self, fig, marker_limit=200, no_ticker_message=""):
+        self.fig = fig
+        self.no_ticker_message = no_ticker_message
+        # pie and bars on top, then the value and price histories across the figure
+        grid = fig.add_gridspec(3, 2)
+        self.alloc = PieChart(fig.add_subplot(grid[0, 0]), "Allocation by Market Value")
+        self.pl = BarChart(fig.add_subplot(grid[0, 1]), "Profit / Loss by Holding")
+        ax_value = fig.add_subplot(grid[1, :])
+        # values only change on trade days, so the line steps between them
+        self.value = DownsampledLine(ax_value, marker_limit=marker_limit, drawstyle="steps-post")
+        ax_value.set_ylabel("Value")
+        ax_price = fig.add_subplot(grid[2, :])
+        self.price = DownsampledLine(ax_price, marker_limit=marker_limit)
+        ax_price.set_xlabel("Date")
+        ax_price.set_ylabel("Price")
+        ax_price.tick_params(axis="x", rotation=45)
+
+    def show(self, data):
+        """Draw a dashboard_data.DashboardData; returns True if the layout should be recomputed."""
+        pid, ticker, holdings, summary, prices, values = data
+        if not holdings:
+            self.clear()
+            return False
+
+        tickers = holdings.values("tickerSymbol")
+        relayout = self.alloc.update(tickers, holdings.array("marketValue", null=0.0))
+        relayout |= self.pl.update(tickers, holdings.array("profitAndLoss", null=0.0))
+
+        days, vals = values
+        if len(days):
+            self.value.set_series(mdates.date2num(days.astype("datetime64[D]")), vals,
+                                  f"Portfolio Value (portfolio {pid}, {len(days):,} trading days)")
+        else:
+            self.value.clear(f"No value history for portfolio {pid} yet\n"
+                             "(daily snapshots are built by snapshots.py).")
+
+        if ticker:
+            days, vals = prices
+            if len(days):
+                self.price.set_series(
+                    mdates.date2num(days.astype("datetime64[D]")), vals,
+                    f"Price History for {ticker} (portfolio {pid}, {len(days):,} trades)")
+            else:
+                self.price.clear(f"No price history for {ticker} in portfolio {pid}.")
+        else:
+            self.price.clear(self.no_ticker_message)
+        return relayout
+
+    def clear(self, message=""):
+        self.alloc.clear()
+        self.pl.clear()
+        self.value.clear()
+        self.price.clear(message)
@@ -0,0 +1,220 @@
+import sys
+from array import array
+from datetime import date
+
+import numpy as np
+
+
+# =========================
+# COLUMNAR RESULTS
+# =========================
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+NULL_INT = np.iinfo(np.int64).min  # NULL in "int" and "date" columns; NaN in "float" ones
+
+# column kind -> (array typecode, NumPy dtype); "str" columns hold int32 codes
+_BUFFERS = {"float": ("d", np.float64), "int": ("q", np.int64), "date": ("q", np.int64),
+            "str": ("i", np.int32)}
+
+
+def _kind(value):
+    if isinstance(value, bool) or type(value) is int:
+        return "int"
+    if type(value) is date:
+        return "date"
+    if isinstance(value, str):
+        return "str"
+    try:
+        float(value)  # Decimal, float
+        return "float"
+    except (TypeError, ValueError):
+        return "object"
+
+
+class _Column:
+    """One column's values in a typed buffer; the kind is taken from its first non-NULL value."""
+
+    def __init__(self, kind=None):
+        self.kind = None
+        self.buf = None
+        self.codes = None    # "str": value -> code, in first-seen order (the labels)
+        self.nulls = 0
+        self._leading = 0    # NULLs seen before the kind was known
+        if kind is not None:
+            self._start(kind)
+
+    def _start(self, kind):
+        self.kind = kind
+        if kind == "object":
+            self.buf = []
+        else:
+            self.buf = array(_BUFFERS[kind][0])
+        if kind == "str":
+            self.codes = {}
+        if self._leading:
+            self._extend((None,) * self._leading)
+            self._leading = 0
+
+    def extend(self, values):
+        if self.kind is None:
+            first = next((v for v in values if v is not None), None)
+            if first is None:
+                self._leading += len(values)
+                self.nulls += len(values)
+                return
+            self._start(_kind(first))
+        self._extend(values)
+
+    def _extend(self, values):
+        kind, buf = self.kind, self.buf
+        nulls = values.count(None)
+        self.nulls += nulls
+        if kind == "str":
+            codes = self.codes
+            buf.extend([codes.setdefault(v, len(codes)) for v in values])
+        elif kind == "float":
+            buf.extend(map(float, values) if not nulls else
+                       [np.nan if v is None else float(v) for v in values])
+        elif kind == "int":
+            buf.extend(values if not nulls else [NULL_INT if v is None else v for v in values])
+        elif kind == "date":
+            buf.extend([NULL_INT if v is None else v.toordinal() - _EPOCH_ORDINAL for v in values])
+        else:
+            buf.extend(values)
+
+    def decode(self):
+        """The column as a list of Python values (floats for DECIMAL), None for NULL."""
+        kind, buf = self.kind, self.buf
+        if kind is None:
+            return [None] * self._leading
+        if kind == "str":
+            labels = list(self.codes)
+            return [labels[c] for c in buf]
+        if kind == "object":
+            return list(buf)
+        values = buf.tolist()
+        if not self.nulls:
+            if kind == "date":
+                return [date.fromordinal(d + _EPOCH_ORDINAL) for d in values]
+            return values
+        if kind == "float":
+            return [None if v != v else v for v in values]
+        if kind == "int":
+            return [None if v == NULL_INT else v for v in values]
+        return [None if d == NULL_INT else date.fromordinal(d + _EPOCH_ORDINAL) for d in values]
+
+    @property
+    def nbytes(self):
+        if self.kind is None:
+            return 0
+        if self.kind == "object":
+            return sys.getsizeof(self.buf) + sum(sys.getsizeof(v) for v in self.buf)
+        n = self.buf.buffer_info()[1] * self.buf.itemsize
+        if self.codes is not None:
+            n += sys.getsizeof(self.codes) + sum(sys.getsizeof(v) for v in self.codes)
+        return n
+
+
+class ColumnarResult:
+    """A query result held column by column in typed buffers instead of as row tuples.
+
+    DECIMAL / float columns are float64 (NaN for NULL), integer columns
+    int64 and DATE columns int64 days since 1970-01-01 (NULL_INT for
+    NULL), each in one array.array; string columns are dictionary-encoded
+    as int32 codes into labels(). A column's kind is taken from its first
+    non-NULL value unless `types` names it ("float", "int", "date", "str"
+    or "object", a plain list), which also types the columns of an empty
+    result.
+
+    Rows are added a cursor chunk at a time with extend(), so a large
+    result is never held as tuples of Decimal / date objects. array()
+    hands out a NumPy view of a column's buffer without copying it (after
+    which the buffer can no longer grow). Iterating yields row tuples, so
+    TableBinding.update(result.cols, result) fills a Treeview from it.
+    """
+
+    def __init__(self, cols, types=None):
+        self.cols = list(cols)
+        types = types or [None] * len(self.cols)
+        self._columns = [_Column(k) for k in types]
+        self._len = 0
+
+    @classmethod
+    def from_chunks(cls, cols, chunks, types=None):
+        result = cls(cols, types)
+        for rows in chunks:
+            result.extend(rows)
+        return result
+
+    @classmethod
+    def from_cursor(cls, cur, chunk_size=1000, types=None):
+        """Read the cursor's current result set into columns, chunk_size rows at a time."""
+        result = cls([d[0] for d in cur.description], types)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return result
+            result.extend(rows)
+
+    def extend(self, rows):
+        if not rows:
+            return
+        for column, values in zip(self._columns, zip(*rows)):
+            column.extend(values)
+        self._len += len(rows)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return zip(*[c.decode() for c in self._columns]) if self._columns else iter(())
+
+    # ---------- column access ----------
+    def _column(self, col):
+        return self._columns[col if isinstance(col, int) else self.cols.index(col)]
+
+    def array(self, col, null=None):
+        """NumPy view of a column's buffer (no copy); int32 codes for strings.
+
+        With `null` given, NULLs read as that value; only then, and only if
+        the column has NULLs, is the array a copy.
+        """
+        c = self._column(col)
+        if c.kind == "object":
+            return np.array(c.buf, dtype=object)
+        dtype = _BUFFERS[c.kind or "float"][1]
+        if c.kind is None:  # nothing but NULLs so far
+            a = np.full(c._leading, np.nan if dtype is np.float64 else NULL_INT, dtype=dtype)
+        else:
+            a = np.frombuffer(c.buf, dtype=dtype)
+        if null is None or not c.nulls or c.kind == "str":
+            return a
+        return np.where(np.isnan(a) if dtype is np.float64 else a == NULL_INT, null, a)
+
+    def labels(self, col):
+        """Distinct values of a string column, indexed by its codes."""
+        c = self._column(col)
+        return list(c.codes) if c.codes is not None else []
+
+    def values(self, col):
+        """A column as a list of Python values."""
+        return self._column(col).decode()
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column buffers and string labels."""
+        return sum(c.nbytes for c in self._columns)
+
+
+def tuple_rows_nbytes(rows):
+    """Bytes held by a list of row tuples: the list, the tuples and every distinct value in them."""
+    seen = set()
+    n = sys.getsizeof(rows)
+    for r in rows:
+        n += sys.getsizeof(r)
+        for v in r:
+            if id(v) not in seen:
+                seen.add(id(v))
+                n += sys.getsizeof(v)
+    return n
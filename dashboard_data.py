@@ -0,0 +1,205 @@
+from collections import namedtuple
+
+import numpy as np
+
+from columnar import ColumnarResult
+from snapshots import VALUE_SERIES_SQL
+
+
+# =========================
+# DASHBOARD QUERIES
+# =========================
+
+HOLDINGS_SQL = (
+    "SELECT tickerSymbol, bookCost, marketValue, profitAndLoss "
+    "FROM UserDefinedHoldingPerformance WHERE portfolioID = %s"
+)
+
+PRICE_HISTORY_SQL = (
+    "SELECT transactionDate, marketPricePerShare "
+    "FROM TransactionRecord "
+    "WHERE portfolioID = %s AND tickerSymbol = %s"
+)
+
+HOLDINGS_COLUMNS = ["tickerSymbol", "bookCost", "marketValue", "profitAndLoss"]
+_HOLDINGS_TYPES = ["str", "float", "float", "float"]
+
+# holdings is a columnar.ColumnarResult of HOLDINGS_COLUMNS; prices and
+# values are (days, values) pairs of NumPy arrays, sorted by day: int64
+# days since 1970-01-01 and float64 prices / end-of-day portfolio values
+# (from the snapshots module)
+DashboardData = namedtuple("DashboardData", "pid ticker holdings summary prices values")
+
+
+def price_history_query(pid, ticker, start=None, end=None):
+    """(sql, params) for one ticker's price history, limited to [start, end] when given."""
+    sql, params = PRICE_HISTORY_SQL, [pid, ticker]
+    if start is not None:
+        sql += " AND transactionDate >= %s"
+        params.append(start)
+    if end is not None:
+        sql += " AND transactionDate <= %s"
+        params.append(end)
+    return sql + " ORDER BY transactionDate", tuple(params)
+
+
+def iter_chunks(cur, chunk_size=1000):
+    """Yield lists of up to chunk_size rows from the cursor's current result set."""
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _read_result(cur, fold, chunk_size):
+    cols = [d[0] for d in cur.description]
+    chunks = iter_chunks(cur, chunk_size)
+    if fold is None:
+        return cols, [r for chunk in chunks for r in chunk]
+    value = fold(chunks)
+    for _ in chunks:  # fold stopped early: finish the result set
+        pass
+    return cols, value
+
+
+def _results(cur, sql, params, trace):
+    """Yield a cursor positioned on each result of a multi-statement batch, in order.
+
+    Statements without a result set, such as a CALL's closing status, yield
+    one with description None.
+    """
+    if hasattr(cur, "nextset"):
+        # mysql-connector >= 9.2: multi-statements are detected automatically
+        cur.execute(sql, params)
+        _lap(trace, "execute")
+        yield cur
+        while cur.nextset():
+            yield cur
+    else:
+        # older connectors iterate per-statement cursors instead
+        per_stmt = cur.execute(sql, params, multi=True)
+        _lap(trace, "execute")
+        yield from per_stmt
+
+
+def fetch_batch(conn, statements, chunk_size=1000, trace=None):
+    """Run several SELECTs in one round trip; return a (columns, rows) pair per statement.
+
+    `statements` is a list of (query, params) or (query, params, fold). The
+    queries are sent as one multi-statement batch, so the server is only
+    contacted once. Rows are read with fetchmany; a statement with a fold
+    gets (columns, fold(chunks)) instead of its rows, so a large result can
+    be reduced chunk by chunk without ever being held as a list of tuples.
+
+    A query_stats.QueryTrace passed as `trace` gets execute / fetch laps.
+    """
+    statements = [s if len(s) == 3 else (s[0], s[1], None) for s in statements]
+    sql = ";\n".join(q for q, _, _ in statements)
+    params = tuple(p for _, ps, _ in statements for p in ps)
+    folds = [f for _, _, f in statements]
+    cur = conn.cursor()
+    try:
+        with_rows = (r for r in _results(cur, sql, params, trace) if r.description is not None)
+        results = [_read_result(r, fold, chunk_size) for fold, r in zip(folds, with_rows)]
+        _lap(trace, "fetch")
+        return results
+    finally:
+        cur.close()
+
+
+def call_batch(conn, name, arg_lists, chunk_size=1000, trace=None):
+    """CALL a stored procedure once per args tuple, all in one round trip.
+
+    Returns (columns, rows) of each call's first result set, in order;
+    columns is None for a call that returned none. Further result sets are
+    read and dropped, so the connection stays usable.
+    """
+    sql = ";\n".join(f"CALL {name}(" + ", ".join(["%s"] * len(args)) + ")" for args in arg_lists)
+    params = tuple(p for args in arg_lists for p in args)
+    results = [(None, []) for _ in arg_lists]
+    cur = conn.cursor()
+    try:
+        i = 0
+        for r in _results(cur, sql, params, trace):
+            if r.description is None:
+                i += 1  # the CALL's status ends its results
+            elif results[i][0] is None:
+                results[i] = _read_result(r, None, chunk_size)
+            else:
+                r.fetchall()
+        _lap(trace, "fetch")
+        return results
+    finally:
+        cur.close()
+
+
+def _lap(trace, phase):
+    if trace is not None:
+        trace.lap(phase)
+
+
+def collect_series(chunks):
+    """Fold (date, price) row chunks into (int64 epoch days, float64 prices) arrays."""
+    series = ColumnarResult.from_chunks(["day", "value"], chunks, ["date", "float"])
+    return series.array("day"), series.array("value")
+
+
+def collect_holdings(chunks):
+    """Fold HOLDINGS_SQL row chunks into a ColumnarResult of HOLDINGS_COLUMNS."""
+    return ColumnarResult.from_chunks(HOLDINGS_COLUMNS, chunks, _HOLDINGS_TYPES)
+
+
+def summarize_holdings(holdings):
+    """Portfolio totals from a collect_holdings() result.
+
+    Same numbers the old GROUP BY portfolioID query returned: NULLs are
+    skipped like SUM() does, and the % gain is None when book cost is zero.
+    """
+    book, market, pl = (float(np.nansum(holdings.array(c))) for c in HOLDINGS_COLUMNS[1:])
+    pct = pl / book * 100 if book else None
+    return {"bookValue": book, "marketValue": market,
+            "profitAndLoss": pl, "totalPercentGain": pct}
+
+
+def load_price_history(conn, pid, ticker, start=None, end=None):
+    """One ticker's (days, prices) arrays, shaped like DashboardData.prices."""
+    statement = price_history_query(pid, ticker, start, end) + (collect_series,)
+    return fetch_batch(conn, [statement])[0][1]
+
+
+def summary_text(pid, summary):
+    """The portfolio totals as the few lines shown above the dashboard charts."""
+    pct = summary["totalPercentGain"]
+    return (f"Portfolio {pid}\n"
+            f"Book Value: {summary['bookValue']:.2f}\n"
+            f"Market Value: {summary['marketValue']:.2f}\n"
+            f"Profit / Loss: {summary['profitAndLoss']:.2f}\n"
+            f"Total % Gain: " + (f"{pct:.2f}%" if pct is not None else "n/a"))
+
+
+def dashboard_statements(pid, ticker=None, start=None, end=None, use_snapshots=True):
+    """The (query, params, fold) statements load_dashboard_data() sends, in order."""
+    statements = [(HOLDINGS_SQL, (pid,), collect_holdings)]
+    if use_snapshots:
+        statements.append((VALUE_SERIES_SQL, (pid,), collect_series))
+    if ticker:
+        statements.append(price_history_query(pid, ticker, start, end) + (collect_series,))
+    return statements
+
+
+def load_dashboard_data(conn, pid, ticker=None, start=None, end=None, trace=None,
+                        use_snapshots=True):
+    """Fetch everything the dashboard shows for one portfolio in a single round trip.
+
+    start / end (dates, inclusive) restrict the price history on the server;
+    `trace` is passed on to fetch_batch(). With use_snapshots false (they
+    have not been built, see snapshots.is_built) the value series is left
+    empty rather than replayed from every trade.
+    """
+    results = iter(r for _, r in fetch_batch(
+        conn, dashboard_statements(pid, ticker, start, end, use_snapshots), trace=trace))
+    holdings = next(results)
+    values = next(results) if use_snapshots else collect_series([])
+    prices = next(results) if ticker else collect_series([])
+    return DashboardData(pid, ticker, holdings, summarize_holdings(holdings), prices, values)
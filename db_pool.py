@@ -0,0 +1,196 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except mysql.connector.Error:
+        pass
+
+
+# =========================
+# CONNECTION POOL
+# =========================
+
+class ConnectionPool:
+    """Thread-safe pool of MySQL connections with idle eviction and health checks.
+
+    Connections are opened lazily, up to `size` at a time. Idle connections
+    older than `idle_timeout` seconds are closed, and a connection that has
+    been idle longer than `ping_after` seconds is pinged (and reopened if the
+    server dropped it) before it is handed out.
+
+    The pool remembers which thread holds each checked-out connection, so
+    a statement running on a given worker can be found (held_by) and
+    cancelled from another connection with KILL QUERY.
+    """
+
+    def __init__(self, config, size=5, idle_timeout=300.0, wait_timeout=10.0,
+                 ping_after=1.0):
+        self.config = dict(config)
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()   # (conn, released_at); most recently used on the right
+        self._open = 0         # connections opened and not yet closed
+        self._closed = False
+        self._holders = {}     # checked-out conn -> ident of the thread holding it
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "wait_time": 0.0,
+                       "timeouts": 0, "evictions": 0, "reconnects": 0}
+
+    # ---------- checkout / checkin ----------
+    def acquire(self):
+        """Return a healthy connection, waiting up to wait_timeout if the pool is exhausted."""
+        stale = []
+        waited_since = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                now = time.monotonic()
+                stale.extend(self._evict_idle(now))
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    self._stats["hits"] += 1
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    conn, released_at = None, None
+                    self._stats["misses"] += 1
+                    break
+                # pool exhausted: wait for a release
+                if waited_since is None:
+                    waited_since = now
+                    self._stats["waits"] += 1
+                remaining = waited_since + self.wait_timeout - now
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    self._stats["wait_time"] += now - waited_since
+                    raise PoolError(f"No free connection after {self.wait_timeout}s "
+                                    f"(pool size {self.size})")
+                self._cond.wait(remaining)
+            if waited_since is not None:
+                self._stats["wait_time"] += time.monotonic() - waited_since
+
+        for c in stale:
+            _close_quietly(c)
+
+        if conn is None:
+            conn = self._open_new()
+        elif time.monotonic() - released_at >= self.ping_after:
+            conn = self._health_checked(conn)
+        with self._cond:
+            self._holders[conn] = threading.get_ident()
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding it if it is no longer usable."""
+        broken = False
+        try:
+            # never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+        except mysql.connector.Error:
+            broken = True
+
+        with self._cond:
+            self._holders.pop(conn, None)
+            if broken or self._closed:
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if broken or self._closed:
+            _close_quietly(conn)
+
+    def discard(self, conn):
+        """Close a checked-out connection instead of returning it (e.g. unread results)."""
+        with self._cond:
+            self._holders.pop(conn, None)
+        self._discard_slot()
+        _close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close idle connections; connections still checked out are closed on release."""
+        with self._cond:
+            self._closed = True
+            idle = [c for c, _ in self._idle]
+            self._open -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for c in idle:
+            _close_quietly(c)
+
+    def held_by(self, thread_id):
+        """Connections currently checked out by the thread with ident `thread_id`."""
+        with self._cond:
+            return [c for c, t in self._holders.items() if t == thread_id]
+
+    # ---------- metrics ----------
+    def stats(self):
+        """Snapshot of pool counters plus current open/idle/in-use connections."""
+        with self._cond:
+            s = dict(self._stats)
+            s["open"] = self._open
+            s["idle"] = len(self._idle)
+            s["in_use"] = self._open - len(self._idle)
+        checkouts = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / checkouts if checkouts else 0.0
+        return s
+
+    # ---------- internals ----------
+    def _connect(self):
+        conn = mysql.connector.connect(**self.config)
+        # autocommit so pooled connections don't hold a stale read snapshot
+        # between checkouts; writers still call commit() explicitly
+        conn.autocommit = True
+        return conn
+
+    def _open_new(self):
+        try:
+            return self._connect()
+        except Exception:
+            self._discard_slot()
+            raise
+
+    def _health_checked(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except mysql.connector.Error:
+            _close_quietly(conn)
+        with self._cond:
+            self._stats["reconnects"] += 1
+        return self._open_new()
+
+    def _discard_slot(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _evict_idle(self, now):
+        """Pop idle connections past idle_timeout (caller holds the lock and closes them)."""
+        evicted = []
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            evicted.append(conn)
+        self._open -= len(evicted)
+        self._stats["evictions"] += len(evicted)
+        return evicted
@@ -0,0 +1,58 @@
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+# =========================
+# DATABASE WORKER PROCESSES
+# =========================
+# Process pools for the headless batch jobs (report.py, risk_engine.py):
+# every worker opens one MySQL connection when it starts and keeps it, and
+# anything else it needs for its whole life (e.g. a matplotlib figure) is
+# set up once by the job's `setup` function and kept in `worker`.
+
+worker = {}  # per-process state: "config", "conn" and whatever setup adds
+
+
+def _init_worker(db_config, setup, setup_args):
+    import mysql.connector
+
+    conn = mysql.connector.connect(**db_config)
+    conn.autocommit = True
+    worker.update(config=db_config, conn=conn)
+    if setup is not None:
+        setup(*setup_args)
+
+
+def connection():
+    """The worker's connection, reopened if the server dropped it."""
+    import mysql.connector
+
+    conn = worker["conn"]
+    try:
+        conn.ping(reconnect=False)
+    except mysql.connector.Error:
+        conn = worker["conn"] = mysql.connector.connect(**worker["config"])
+        conn.autocommit = True
+    return conn
+
+
+def run_tasks(fn, tasks, db_config, workers=None, setup=None, setup_args=()):
+    """Run fn(*task) for every task on a pool of worker processes; yields (task, future) as each finishes.
+
+    Each worker connects with `db_config` and then calls setup(*setup_args);
+    fn, setup and their arguments must be picklable (module-level functions).
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(db_config, setup, tuple(setup_args))) as pool:
+        futures = {pool.submit(fn, *task): task for task in tasks}
+        for fut in as_completed(futures):
+            yield futures[fut], fut
+    sys.stderr.write("\n")  # ends the progress() line
+
+
+def progress(done, total, count, unit, started, extra=""):
+    """Rewrite the stderr progress line: tasks done, `count` `unit` and their rate."""
+    rate = count / (time.perf_counter() - started)
+    sys.stderr.write(f"\r[{done}/{total}] {count:,} {unit}, {rate:,.1f} {unit}/s{extra} ")
+    sys.stderr.flush()
@@ -0,0 +1,129 @@
+import queue
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+# =========================
+# BACKGROUND EXECUTOR
+# =========================
+
+class TkExecutor:
+    """Run blocking work on worker threads and deliver results on the Tk thread.
+
+    Workers never touch widgets: finished futures are queued and drained by
+    an after() loop on the mainloop, which runs the on_done / on_error
+    callbacks there. Each job belongs to a named tab so the tab can show a
+    loading indicator while it has work in flight.
+
+    With a QueryStats as `stats`, jobs run through stats.captured() and the
+    time on_done takes is recorded as the render phase of the statements
+    the job ran.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=25, stats=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.stats = stats
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._done = queue.SimpleQueue()
+        self._calls = queue.SimpleQueue()   # (fn, args) posted from workers
+        self._pending = {}     # tab -> jobs in flight
+        self._labels = {}      # tab -> status Label
+        self._errors = {}      # tab -> last error since its latest submit
+        self._stopped = False
+        self._after_id = root.after(poll_ms, self._drain)
+
+    # ---------- public API ----------
+    def register_status(self, tab, label):
+        """Use `label` to show loading / error state for jobs submitted under `tab`."""
+        self._labels[tab] = label
+
+    def submit(self, tab, fn, *args, on_done=None, on_error=None, **kwargs):
+        """Run fn(*args, **kwargs) on a worker; call on_done(result) or on_error(exc) on the Tk thread."""
+        self._pending[tab] = self._pending.get(tab, 0) + 1
+        self._errors.pop(tab, None)
+        self._show(tab)
+        if self.stats is not None:
+            fut = self._pool.submit(self.stats.captured, fn, *args, **kwargs)
+        else:
+            fut = self._pool.submit(lambda: ([], fn(*args, **kwargs)))
+        fut.add_done_callback(lambda f: self._done.put((tab, f, on_done, on_error)))
+        return fut
+
+    def post(self, fn, *args):
+        """Run fn(*args) on the Tk thread; safe to call from workers (e.g. progress updates)."""
+        self._calls.put((fn, args))
+
+    def busy(self, tab):
+        return self._pending.get(tab, 0) > 0
+
+    def shutdown(self):
+        self._stopped = True
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- Tk-thread side ----------
+    def _drain(self):
+        try:
+            self._run_queued()
+        finally:
+            # whatever a callback did, keep delivering results
+            if not self._stopped:
+                self._after_id = self.root.after(self.poll_ms, self._drain)
+
+    def _run_queued(self):
+        while True:
+            try:
+                fn, args = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            error = self._call(fn, *args)
+            if error is not None:
+                # a posted call belongs to no tab, so there is no label to show it on
+                traceback.print_exception(error, file=sys.stderr)
+        while True:
+            try:
+                tab, fut, on_done, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending[tab] -= 1
+            error = None
+            if fut.cancelled():
+                pass
+            elif fut.exception() is not None:
+                error = fut.exception()
+                if on_error:
+                    error = self._call(on_error, error)
+            elif on_done:
+                traces, result = fut.result()
+                t0 = time.perf_counter()
+                error = self._call(on_done, result)
+                if traces:
+                    self.stats.record_render(traces, (time.perf_counter() - t0) * 1000)
+            if error is not None:
+                self._errors[tab] = error
+            self._show(tab)
+
+    @staticmethod
+    def _call(callback, *args):
+        """Run a callback, returning any exception it raised instead of killing the drain loop."""
+        try:
+            callback(*args)
+        except Exception as e:
+            return e
+        return None
+
+    def _show(self, tab):
+        label = self._labels.get(tab)
+        if label is None:
+            return
+        if self.busy(tab):
+            label.config(text="Loading...", fg="#e0e0e0")
+        elif tab in self._errors:
+            label.config(text=f"Error: {self._errors[tab]}", fg="#ff6666")
+        else:
+            label.config(text="")
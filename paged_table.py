@@ -0,0 +1,304 @@
+import time
+from bisect import bisect_left
+from tkinter import *
+from tkinter import ttk
+
+from table_binding import TableBinding
+
+
+# =========================
+# KEYSET PAGINATION
+# =========================
+
+class KeysetQuery:
+    """A SELECT read page by page, each page continuing from the key of the last row seen.
+
+    `keys` are the ORDER BY columns, which must be unique together and be
+    part of the select list, e.g. ["userID"] or ["transactionDate",
+    "transactionID"]. Unlike OFFSET, a keyset page costs the same no
+    matter how deep into the table it is.
+    """
+
+    def __init__(self, select_sql, keys, descending=False):
+        self.select_sql = select_sql
+        self.keys = list(keys)
+        self.descending = descending
+
+    def page(self, key=None, limit=200, backwards=False):
+        """(sql, params) for the `limit` rows after `key` (before it when backwards)."""
+        desc = self.descending != backwards
+        op = "<" if desc else ">"
+        sql = self.select_sql
+        params = []
+        if key is not None:
+            # (k1 > a) OR (k1 = a AND k2 > b) ... stays index-friendly, unlike row comparisons
+            terms = []
+            for i, k in enumerate(self.keys):
+                conds = [f"{prev} = %s" for prev in self.keys[:i]] + [f"{k} {op} %s"]
+                terms.append("(" + " AND ".join(conds) + ")")
+                params.extend(key[:i + 1])
+            sql += " WHERE " + " OR ".join(terms)
+        direction = "DESC" if desc else "ASC"
+        sql += " ORDER BY " + ", ".join(f"{k} {direction}" for k in self.keys)
+        sql += " LIMIT %s"
+        params.append(limit)
+        return sql, tuple(params)
+
+
+class _Desc:
+    """Wraps a value so that sorting ascending orders it descending."""
+    __slots__ = ("v",)
+
+    def __init__(self, v):
+        self.v = v
+
+    def __lt__(self, other):
+        return self.v > other.v
+
+    def __eq__(self, other):
+        return self.v == other.v
+
+
+# =========================
+# PAGED TABLE WIDGET
+# =========================
+
+class PagedTable(Frame):
+    """Treeview that pages rows in as the user scrolls and keeps a bounded window of them.
+
+    Pages are fetched on the executor under `tab` with fetch(sql, params),
+    which must return (columns, rows). Scrolling near the bottom loads the
+    next page; once more than `max_rows` are shown, rows scrolled far out
+    of view are dropped and reloaded from the server if the user scrolls
+    back to them. Rows are keyed by the query's keys through a
+    TableBinding, so a reload only touches rows of the first page that
+    changed.
+    """
+
+    def __init__(self, parent, jobs, tab, query, fetch, page_size=200, max_rows=1000,
+                 prefetch=0.1, **tree_kw):
+        super().__init__(parent, bg="#222222")
+        self.jobs = jobs
+        self.tab = tab
+        self.query = query
+        self.fetch = fetch
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.prefetch = prefetch  # fraction of the scroll range that triggers a load
+
+        self.tree = ttk.Treeview(self, show="headings", **tree_kw)
+        self._vsb = ttk.Scrollbar(self, orient=VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+        self._vsb.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+
+        self.binding = TableBinding(self.tree, query.keys)
+        self._gen = 0            # bumped by reload() so late pages are ignored
+        self._loading = False
+        self._at_end = True      # no rows after the bottom of the window
+        self._has_before = False # rows were trimmed from the top of the window
+
+    def reload(self):
+        """Start again from the first page; current rows stay until it arrives."""
+        self._gen += 1
+        self._request(None, backwards=False)
+
+    def show(self, cols, rows):
+        """Show a fixed set of rows, e.g. search results, instead of pages; reload() pages again."""
+        self._gen += 1  # pages still in flight are ignored
+        self._loading = False
+        self.binding.update(cols, rows)
+        self._has_before = False
+        self._at_end = True
+
+    def insert_rows(self, cols, rows):
+        """Merge rows that appeared since the window was loaded; returns how many were shown.
+
+        Each row goes where the query's ORDER BY would put it. Rows already
+        shown, and rows outside the loaded window (they will be paged in
+        when scrolled to), are skipped. The view stays on the rows the user
+        was looking at unless they were at the very top.
+        """
+        b = self.binding
+        if cols != b.cols:
+            return 0
+        children = list(self.tree.get_children())
+        # sort keys ascending so bisect works for either direction
+        sign = -1 if self.query.descending else 1
+        order = [self._sort_key(b.key(iid), sign) for iid in children]
+        first = round(float(self.tree.yview()[0]) * len(children))  # first visible row
+        above = inserted = 0
+        for r in rows:
+            if b.iid(r) in b.rows:
+                continue
+            sk = self._sort_key(b.row_key(r), sign)
+            pos = bisect_left(order, sk)
+            if (pos == 0 and self._has_before) or (pos == len(order) and not self._at_end):
+                continue
+            b.insert(pos, r)
+            order.insert(pos, sk)
+            inserted += 1
+            if first and pos <= first:
+                above += 1
+                first += 1
+        if above:
+            self.tree.yview_scroll(above, "units")
+        if inserted:
+            self._trim(from_top=False)
+        return inserted
+
+    @staticmethod
+    def _sort_key(key, sign):
+        # descending keys are compared through a wrapper that reverses the order
+        return key if sign > 0 else tuple(_Desc(k) for k in key)
+
+    # ---------- fetching ----------
+    def _request(self, key, backwards):
+        self._loading = True
+        gen = self._gen
+        sql, params = self.query.page(key, self.page_size, backwards)
+        self.jobs.submit(self.tab, self.fetch, sql, params,
+                         on_done=lambda res: self._on_page(gen, res, key is None, backwards),
+                         on_error=lambda e: self._on_error(gen, e))
+
+    def _on_error(self, gen, error):
+        if gen == self._gen:
+            self._loading = False
+        raise error
+
+    def _on_page(self, gen, result, reset, backwards):
+        if gen != self._gen:
+            return
+        self._loading = False
+        cols, rows = result
+        full = len(rows) == self.page_size
+        if reset:
+            # the window becomes the first page; rows that didn't change stay as they are
+            self.binding.update(cols, rows)
+            self._has_before = False
+            self._at_end = not full
+        elif backwards:
+            self._has_before = full
+            for r in rows:  # nearest-first from the server, so each goes on top
+                self.binding.insert(0, r)
+            self.tree.yview_scroll(len(rows), "units")
+            self._trim(from_top=False)
+        else:
+            self._at_end = not full
+            for r in rows:
+                self.binding.insert(END, r)
+            self._trim(from_top=True)
+
+    def _trim(self, from_top):
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess <= 0:
+            return
+        drop = children[:excess] if from_top else children[-excess:]
+        self.binding.delete(*drop)
+        if from_top:
+            self._has_before = True
+            self.tree.yview_scroll(-excess, "units")
+        else:
+            self._at_end = False
+
+    # ---------- scrolling ----------
+    def _on_yscroll(self, first, last):
+        self._vsb.set(first, last)
+        children = self.tree.get_children()
+        if self._loading or not children:
+            return
+        if float(last) >= 1 - self.prefetch and not self._at_end:
+            self._request(self.binding.key(children[-1]), backwards=False)
+        elif float(first) <= self.prefetch and self._has_before:
+            self._request(self.binding.key(children[0]), backwards=True)
+
+
+# =========================
+# LIVE UPDATES
+# =========================
+
+class DeltaPoller:
+    """Keeps a PagedTable current by polling for rows past a watermark.
+
+    fetch(watermark) runs on the executor and returns (columns, rows,
+    new_watermark) for the rows added since `watermark` (None on the first
+    poll, which only establishes it). New rows are merged with
+    table.insert_rows(), so nothing already shown is fetched again.
+
+    The interval adapts: min_ms right after rows arrived, doubling up to
+    max_ms while nothing changes, and hidden_ms while active() is false
+    (tab hidden or user away). poke() polls right away, e.g. after a local
+    insert or when the tab is shown again. on_status(text) reports state.
+    """
+
+    def __init__(self, table, fetch, min_ms=2000, max_ms=30000, hidden_ms=120000,
+                 active=None, on_status=None):
+        self.table = table
+        self.fetch = fetch
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.hidden_ms = hidden_ms
+        self.active = active or (lambda: True)
+        self.on_status = on_status or (lambda text: None)
+        self.watermark = None
+        self.interval = min_ms
+        self._after_id = None
+        self._in_flight = False
+        self._stopped = True
+
+    def start(self):
+        self._stopped = False
+        self.poke()
+
+    def stop(self):
+        self._stopped = True
+        self._cancel()
+
+    def poke(self):
+        """Poll now and go back to the shortest interval."""
+        if self._stopped:
+            return
+        self.interval = self.min_ms
+        self._cancel()
+        self._poll()
+
+    def _cancel(self):
+        if self._after_id is not None:
+            self.table.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule(self):
+        if self._stopped:
+            return
+        delay = self.interval if self.active() else max(self.hidden_ms, self.interval)
+        self._after_id = self.table.after(delay, self._poll)
+
+    def _poll(self):
+        self._after_id = None
+        if self._in_flight:  # the running poll reschedules when it finishes
+            return
+        self._in_flight = True
+        # not under the table's tab, so polls don't flash its "Loading..." label
+        self.table.jobs.submit(self.table.tab + ".poll", self.fetch, self.watermark,
+                               on_done=self._on_rows, on_error=self._on_error)
+
+    def _on_rows(self, result):
+        self._in_flight = False
+        cols, rows, watermark = result
+        first = self.watermark is None
+        self.watermark = watermark
+        added = 0 if first or not rows else self.table.insert_rows(cols, rows)
+        if rows and not first:
+            self.interval = self.min_ms
+        else:
+            self.interval = min(self.interval * 2, self.max_ms)
+        stamp = time.strftime("%H:%M:%S")
+        self.on_status(f"Live: {added} new at {stamp}" if added else f"Live: checked {stamp}")
+        self._schedule()
+
+    def _on_error(self, error):
+        self._in_flight = False
+        self.interval = self.max_ms
+        self.on_status(f"Live: {error} (retrying in {self.interval // 1000}s)")
+        self._schedule()
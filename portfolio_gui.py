@@ -1,8 +1,27 @@
-import mysql.connector
+import time
+_STARTED = time.perf_counter()  # startup is timed from here to the first idle mainloop
+
+import functools
+import sys
+import threading
+from contextlib import closing
+from datetime import date
 from tkinter import *
-from tkinter import ttk, messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from tkinter import ttk, messagebox, filedialog
+
+# matplotlib, NumPy and the modules built on them (charts, dashboard_data)
+# are imported when first needed, not at startup
+from db_pool import ConnectionPool
+from executor import TkExecutor
+from paged_table import DeltaPoller, KeysetQuery, PagedTable
+from query_cache import QueryCache
+from query_stats import QueryStats
+from request_coordinator import RequestCoordinator
+from search_index import SearchIndex, TypeAheadFilter
+from snapshots import is_built, update_snapshots
+from table_binding import TableBinding
+from tx_import import INSERT_SQL, ImportReport, import_transactions, parse_record, write_batch
+from write_behind import Journal, JournalLocked, WriteBehindQueue
 
 # =========================
 # DB CONFIG - EDIT THIS
@@ -14,54 +33,364 @@ DB_CONFIG = {
     "database": "3309Grp13", # <- your DB name
 }
 
+POOL_CONFIG = {
+    "size": 5,            # max open connections
+    "idle_timeout": 300,  # seconds an unused connection stays open
+    "wait_timeout": 10,   # seconds to wait when every connection is busy
+    "ping_after": 1.0,    # health-check connections idle longer than this
+}
+
+CACHE_CONFIG = {
+    "max_entries": 256,   # LRU bound on cached result sets
+    "default_ttl": 60,
+}
+
+# seconds each kind of result may be served from the cache
+CACHE_TTL = {
+    "users": 30,
+    "portfolios": 30,
+    "holdings": 60,
+    "dashboard": 60,
+    "transactions": 15,
+    "risk": 120,
+    "snapshots": 300,   # how long "not built yet" is believed before asking again
+}
+
+PAGE_SIZE = 200          # rows fetched per page in the Users/Portfolios/Transactions tables
+SEARCH_LIMIT = 200       # most rows shown for a type-ahead search
+MAX_TABLE_ROWS = 1000    # rows kept in a table widget before far-away ones are dropped
+IMPORT_BATCH_SIZE = 1000 # rows per executemany/commit when importing transaction files
+STREAM_CHUNK_SIZE = 500  # rows per fetchmany when streaming a result into a table
+STREAM_CACHE_ROWS = 5000 # streamed results up to this many rows are also cached
+PRICE_MARKER_LIMIT = 200 # draw point markers only when this few prices are on screen
+
+# live Transactions view: poll intervals (ms) adapt between min and max while the
+# tab is visible and the user active, and fall to hidden_ms otherwise
+LIVE_POLL = {"min_ms": 2000, "max_ms": 30000, "hidden_ms": 120000}
+LIVE_BATCH = 500         # most new rows merged per poll
+USER_IDLE_S = 300        # no key or mouse input for this long counts as away
+
+KILL_AFTER_S = 0.5       # a superseded statement still running after this long is killed
+# entry-form trades are inserted directly; with a journal path, e.g.
+# os.path.join(os.path.expanduser("~"), ".portfolio_manager", "transactions.journal"),
+# they are journaled there and written in the background
+WRITE_BEHIND_JOURNAL = None
+WRITE_BEHIND = {"delay_ms": 200, "retry_ms": 1000, "max_retry_ms": 30000}
+SNAPSHOT_REFRESH_MS = 60000  # how often new trades are folded into the daily value snapshots
+
+STATS_CONFIG = {
+    "slow_ms": 500,         # executions slower than this (all phases) go to the slow-query log
+    "window": 1000,         # percentiles cover this many latest executions per statement
+    "slow_log_size": 200,
+}
+
+POOL = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+CACHE = QueryCache(**CACHE_CONFIG)
+STATS = QueryStats(**STATS_CONFIG)
 
 
 # =========================
 # DB HELPERS
 # =========================
+# These run on executor worker threads: they never touch widgets and let
+# mysql.connector.Error propagate so the executor can report it on the tab.
+#
+# Reads pass a ttl to be served from CACHE; cache entries are tagged, e.g.
+# ("portfolio", 7) or ("table", "UserProfile"), and writes name the tags
+# they make stale so only those entries are evicted.
+#
+# Every statement runs inside STATS.trace(), which times its connect /
+# execute / fetch phases (render is added by the executor) under the
+# normalized SQL; a trace with no execute phase was a cache hit.
+
+def fetch_all(query, params=None, ttl=None, tags=()):
+    """Run SELECT and return (columns, rows); cached for `ttl` seconds when given."""
+    with STATS.trace(query) as t:
+        if ttl is None:
+            cols, rows = _fetch_all(query, params, t)
+        else:
+            cols, rows = CACHE.get_or_load(QueryCache.key(query, params),
+                                           lambda: _fetch_all(query, params, t), ttl, tags)
+        t.rows = len(rows)
+        return cols, rows
 
-def get_conn():
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as e:
-        messagebox.showerror("DB Error", str(e))
-        return None
-
-
-def fetch_all(query, params=None):
-    """Run SELECT and return (columns, rows)."""
-    conn = get_conn()
-    if not conn:
-        return [], []
-    cur = conn.cursor()
-    try:
-        cur.execute(query, params or ())
-        rows = cur.fetchall()
-        cols = [d[0] for d in cur.description]
+
+def _fetch_all(query, params, trace):
+    with POOL.connection() as conn:
+        trace.lap("connect")
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params or ())
+            trace.lap("execute")
+            rows = cur.fetchall()
+            cols = [d[0] for d in cur.description]
+            trace.lap("fetch")
+            return cols, rows
+        finally:
+            cur.close()
+
+
+def stream_rows(query, params=None, chunk_size=STREAM_CHUNK_SIZE, ttl=None, tags=()):
+    """Yield (columns, rows) chunks of a SELECT as they arrive from the server.
+
+    Uses an unbuffered cursor and fetchmany, so only one chunk is held at a
+    time; the first chunk is yielded even if it is empty. With a ttl, a
+    cached result is replayed instead, and results of up to
+    STREAM_CACHE_ROWS rows are cached once fully read. The pooled
+    connection is held until the generator finishes; closing it early
+    discards the connection rather than reading the rest of the result.
+    """
+    key = QueryCache.key(query, params)
+    with STATS.trace(query) as t:
+        if ttl is not None:
+            hit, cached = CACHE.get(key)
+            if hit:
+                cols, rows = cached
+                t.rows = len(rows)
+                for i in range(0, max(len(rows), 1), chunk_size):
+                    yield cols, rows[i:i + chunk_size]
+                return
+
+        epoch = CACHE.epoch()
+        kept = [] if ttl is not None else None
+        t.rows = 0
+        with t.phase("connect"):
+            conn = POOL.acquire()
+        finished = False
+        try:
+            cur = conn.cursor(buffered=False)
+            with t.phase("execute"):
+                cur.execute(query, params or ())
+            cols = [d[0] for d in cur.description]
+            with t.phase("fetch"):
+                rows = cur.fetchmany(chunk_size)
+            while True:
+                t.rows += len(rows)
+                if kept is not None:
+                    kept.extend(rows)
+                    if len(kept) > STREAM_CACHE_ROWS:
+                        kept = None
+                yield cols, rows
+                with t.phase("fetch"):  # time waiting on the consumer is not charged
+                    rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+            cur.close()
+            finished = True
+        finally:
+            if finished:
+                POOL.release(conn)
+            else:
+                POOL.discard(conn)
+    if kept is not None:
+        CACHE.put(key, (cols, kept), ttl, tags, epoch=epoch)
+
+
+def execute_action(query, params=None, invalidates=()):
+    """Run INSERT/UPDATE/DELETE, then evict cache entries tagged with `invalidates`."""
+    with STATS.trace(query) as t, POOL.connection() as conn:
+        t.lap("connect")
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params or ())
+            conn.commit()
+            t.lap("execute")
+            t.rows = cur.rowcount
+        finally:
+            cur.close()
+    CACHE.invalidate(*invalidates)
+    return True
+
+
+def delete_user_cascade(user_id):
+    """Delete a user; also evicts the entries of the portfolios the FK cascade removes with it."""
+    query = "DELETE FROM UserProfile WHERE userID = %s"
+    with STATS.trace(query) as t, POOL.connection() as conn:
+        t.lap("connect")
+        cur = conn.cursor()
+        try:
+            # pooled connections autocommit: without a transaction the FOR UPDATE
+            # locks would be gone before the DELETE, and a portfolio added in
+            # between would be cascaded away without its entries being evicted
+            conn.start_transaction()
+            cur.execute("SELECT portfolioID FROM Portfolio WHERE userID = %s FOR UPDATE", (user_id,))
+            pids = [r[0] for r in cur.fetchall()]
+            cur.execute(query, (user_id,))
+            t.rows = cur.rowcount
+            conn.commit()
+            t.lap("execute")
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    CACHE.invalidate(("user", user_id), ("table", "UserProfile"), ("table", "Portfolio"),
+                     ("table", "TransactionRecord"), ("risk",),
+                     *[("portfolio", pid) for pid in pids])
+    return True
+
+
+def call_procedure(name, args=(), ttl=None, tags=()):
+    """Call a stored procedure and return (columns, rows) of its first result set."""
+    with STATS.trace(f"CALL {name}(" + ", ".join(["%s"] * len(args)) + ")") as t:
+        if ttl is None:
+            cols, rows = _call_procedure(name, args, t)
+        else:
+            cols, rows = CACHE.get_or_load(("CALL " + name, tuple(args)),
+                                           lambda: _call_procedure(name, args, t), ttl, tags)
+        t.rows = len(rows)
         return cols, rows
-    except mysql.connector.Error as e:
-        messagebox.showerror("SQL Error", str(e))
-        return [], []
-    finally:
-        conn.close()
 
 
-def execute_action(query, params=None):
-    """Run INSERT/UPDATE/DELETE."""
-    conn = get_conn()
-    if not conn:
-        return False
-    cur = conn.cursor()
-    try:
-        cur.execute(query, params or ())
-        conn.commit()
-        return True
-    except mysql.connector.Error as e:
-        messagebox.showerror("SQL Error", str(e))
-        return False
-    finally:
-        conn.close()
+def _call_procedure(name, args, trace):
+    from dashboard_data import call_batch
+
+    with POOL.connection() as conn:
+        trace.lap("connect")
+        return call_batch(conn, name, [args], STREAM_CHUNK_SIZE, trace)[0]
+
+
+# =========================
+# TAB QUERIES
+# =========================
+
+USERS_QUERY = KeysetQuery("SELECT userID, fName, lName, dateOfBirth FROM UserProfile", ["userID"])
+
+PORTFOLIOS_QUERY = KeysetQuery("SELECT portfolioID, baseCurrency, userID FROM Portfolio",
+                               ["portfolioID"])
+
+# newest first; scrolling down pages back through the whole history
+TRANSACTIONS_QUERY = KeysetQuery(
+    "SELECT transactionID, portfolioID, tickerSymbol, investmentType, "
+    "marketPricePerShare, salePricePerShare, quantity, transactionDate "
+    "FROM TransactionRecord",
+    ["transactionDate", "transactionID"], descending=True)
+
+# rows past the live view's watermark; transactionID is the primary key, so
+# this is a cheap range scan however large the table is
+TRANSACTIONS_NEWER_SQL = (TRANSACTIONS_QUERY.select_sql +
+                          " WHERE transactionID > %s ORDER BY transactionID LIMIT %s")
+
+# columns each tab's type-ahead filter searches
+USERS_SEARCH_FIELDS = ["userID", "fName", "lName"]
+PORTFOLIOS_SEARCH_FIELDS = ["portfolioID", "baseCurrency", "userID"]
+
+HOLDINGS_PERFORMANCE_SQL = (
+    "SELECT tickerSymbol, quantityOwned, bookCost, marketValue, profitAndLoss, percentGain "
+    "FROM UserDefinedHoldingPerformance WHERE portfolioID = %s"
+)
+
+
+def fetch_new_transactions(watermark):
+    """Worker side of the live Transactions view: (columns, rows, new watermark).
+
+    The watermark is the highest transactionID seen; None fetches only the
+    current maximum. New rows mean someone else wrote, so cached pages,
+    holdings and risk results they affect are evicted.
+    """
+    if watermark is None:
+        _, rows = fetch_all("SELECT MAX(transactionID) FROM TransactionRecord")
+        return None, [], rows[0][0] or 0
+    cols, rows = fetch_all(TRANSACTIONS_NEWER_SQL, (watermark, LIVE_BATCH))
+    if not rows:
+        return cols, rows, watermark
+    CACHE.invalidate(("table", "TransactionRecord"), ("risk",),
+                     *{("portfolio", r[1]) for r in rows})
+    return cols, rows, max(r[0] for r in rows)
+
+
+def load_search_index(query, fields, last_key, size):
+    """Worker side of a type-ahead filter: a SearchIndex over `query`'s rows, or rows to add to one.
+
+    With last_key None, every row is read and indexed. Otherwise only the
+    rows past last_key are returned, unless the table no longer has `size`
+    rows up to it (someone else deleted some), in which case the index is
+    built again. Both are range scans on the key.
+    """
+    key = query.keys[0]
+    if last_key is not None:
+        _, rows = fetch_all(f"SELECT COUNT(*) FROM ({query.select_sql} WHERE {key} <= %s) t",
+                            (last_key,))
+        if rows[0][0] == size:
+            return fetch_all(f"{query.select_sql} WHERE {key} > %s ORDER BY {key}", (last_key,))[1]
+    cols, rows = fetch_all(f"{query.select_sql} ORDER BY {key}")
+    return SearchIndex(cols, key, fields, rows)
+
+
+def write_transactions(batch):
+    """Worker side of the write-behind queue: one multi-row INSERT and one commit.
+
+    `batch` is [(seq, record)] of journaled entry-form records; returns
+    [(seq, message)] for the records that failed validation or that the
+    server rejected.
+    """
+    report = ImportReport()
+    rows = []
+    for seq, rec in batch:
+        try:
+            rows.append((seq, parse_record(rec)))
+        except ValueError as e:
+            # e.g. journaled by a version with looser checks: rejected on its own,
+            # like a row the server turns down, instead of failing every retry
+            report.add_error(seq, str(e))
+    if rows:
+        with STATS.trace(INSERT_SQL) as t, POOL.connection() as conn:
+            t.lap("connect")
+            write_batch(conn, rows, report)
+            t.lap("execute")
+            t.rows = report.inserted
+        CACHE.invalidate(("table", "TransactionRecord"), ("risk",),
+                         *[("portfolio", pid) for pid in report.portfolios])
+    return report.errors
+
+
+_snapshots = {"built": False, "checked": None}  # once built, snapshots stay built
+
+
+def snapshots_built():
+    """Whether dashboards can read the value series from the snapshots.
+
+    Once true this never queries again; a false answer is kept for
+    CACHE_TTL["snapshots"] seconds, so an install without snapshots does
+    not pay an extra round trip per dashboard load.
+    """
+    s = _snapshots
+    now = time.monotonic()
+    if not s["built"] and (s["checked"] is None or now - s["checked"] >= CACHE_TTL["snapshots"]):
+        with STATS.trace("snapshots: is built") as t, POOL.connection() as conn:
+            t.lap("connect")
+            s["built"] = is_built(conn)
+            t.lap("execute")
+        s["checked"] = now
+    return s["built"]
+
+
+def refresh_snapshots():
+    """Fold changed trades into the daily value snapshots and evict the dashboards they change.
+
+    Does nothing until an administrator has installed and built the
+    snapshots with `python snapshots.py`; the GUI never creates tables.
+    """
+    with STATS.trace("snapshots: update") as t, POOL.connection() as conn:
+        t.lap("connect")
+        changed = update_snapshots(conn, batch_size=IMPORT_BATCH_SIZE)
+        t.lap("execute")
+        t.rows = len(changed)
+    CACHE.invalidate(*[("portfolio", pid) for pid in changed])
+    return changed
+
+
+def fetch_risk(uid):
+    """Worker side of the Risk Analysis tab: (columns, rows) of GetRiskAnalysis and their allocation.
+
+    The allocation is risk_engine's RiskResult, None when the procedure's
+    result lacks the columns it is computed from.
+    """
+    from risk_engine import RISK_PROCEDURE, allocate, collect
+
+    cols, rows = call_procedure(RISK_PROCEDURE, (uid,), ttl=CACHE_TTL["risk"],
+                                tags=[("user", uid), ("risk",)])
+    return cols, rows, allocate(collect([(uid, cols, rows)]))
 
 
 # =========================
@@ -74,8 +403,80 @@ class PortfolioApp(Tk):
         self.title("Investment Portfolio Manager")
         self.geometry("1300x780")
 
+        # all DB work runs here so the mainloop never blocks on a round trip
+        self.jobs = TkExecutor(self, max_workers=4, stats=STATS)
+        # requests feeding one widget: identical ones share a run, superseded ones are dropped
+        self.requests = RequestCoordinator(self.jobs, POOL, kill_after=KILL_AFTER_S)
+        self._tree_streams = {}  # tree -> id of the stream currently filling it
+        self._bindings = {}      # tree -> TableBinding that keeps its rows in sync
+
+        self.startup_ms = None   # set once the window is up and idle
+        self.tab_build_ms = {}   # tab text -> ms spent building it
+        self.tx_poller = None
+        self._diag_after = None  # Diagnostics refresh, once that tab is built
+        self._last_input = time.monotonic()
+        self.lbl_tx_queue = None
+        self._queue_text = ""
+        self.tx_queue = None
+        journal = None
+        if WRITE_BEHIND_JOURNAL:
+            try:
+                journal = Journal(WRITE_BEHIND_JOURNAL)
+            except JournalLocked as e:
+                messagebox.showwarning("Write-behind", f"{e}; trades will be inserted directly.")
+        if journal is not None:
+            # entries from an earlier session still in the journal are flushed right away
+            self.tx_queue = WriteBehindQueue(
+                self, self.jobs, "transactions.flush", journal,
+                write_transactions, batch_size=IMPORT_BATCH_SIZE, **WRITE_BEHIND,
+                on_status=self._show_queue_status, on_flushed=self._transactions_flushed)
+            self.tx_queue.start()
+
         self._setup_style()
         self._build_ui()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after_idle(self._mark_started)
+        # the refresh timer only runs once the snapshots are known to be built
+        self._snapshot_after = None
+        self.jobs.submit("snapshots", snapshots_built, on_done=lambda _: self._start_snapshot_timer())
+        for seq in ("<Any-KeyPress>", "<Any-ButtonPress>", "<MouseWheel>"):
+            self.bind_all(seq, self._note_input, add="+")
+
+    def _note_input(self, event):
+        self._last_input = time.monotonic()
+
+    def user_active(self):
+        return time.monotonic() - self._last_input < USER_IDLE_S
+
+    def _mark_started(self):
+        self.startup_ms = (time.perf_counter() - _STARTED) * 1000
+
+    def _start_snapshot_timer(self):
+        if self._snapshot_after is None and _snapshots["built"]:
+            self._snapshot_after = self.after(SNAPSHOT_REFRESH_MS, self._snapshot_tick)
+
+    def _snapshot_tick(self):
+        self.refresh_snapshots()
+        self._snapshot_after = self.after(SNAPSHOT_REFRESH_MS, self._snapshot_tick)
+
+    def refresh_snapshots(self):
+        """Catch the value snapshots up with new trades in the background, once they are built."""
+        if _snapshots["built"] and not self.jobs.busy("snapshots"):
+            self.jobs.submit("snapshots", refresh_snapshots)
+
+    def _on_close(self):
+        for after_id in (self._snapshot_after, self._diag_after):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        if self.tx_poller is not None:
+            self.tx_poller.stop()
+        if self.tx_queue is not None:
+            self.tx_queue.stop()  # anything still pending goes out next session
+            self.tx_queue.journal.close()
+        self._tree_streams.clear()  # lets streaming workers stop waiting on the Tk thread
+        self.requests.shutdown()
+        self.jobs.shutdown()
+        self.destroy()
 
     # ---------- styling ----------
     def _setup_style(self):
@@ -98,18 +499,112 @@ class PortfolioApp(Tk):
         self.tab_portfolios  = Frame(notebook, bg="#222222")
         self.tab_transactions = Frame(notebook, bg="#222222")
         self.tab_risk        = Frame(notebook, bg="#222222")
+        self.tab_diag        = Frame(notebook, bg="#222222")
 
         notebook.add(self.tab_dashboard,   text="Dashboard")
         notebook.add(self.tab_users,       text="Users")
         notebook.add(self.tab_portfolios,  text="Portfolios & Holdings")
         notebook.add(self.tab_transactions,text="Transactions")
         notebook.add(self.tab_risk,        text="Risk Analysis")
+        notebook.add(self.tab_diag,        text="Diagnostics")
+        self.notebook = notebook
+
+        # a tab's widgets are built, and its first query run, when it is first shown
+        self._tab_builders = {
+            str(self.tab_dashboard): self._build_dashboard_tab,
+            str(self.tab_users): self._build_users_tab,
+            str(self.tab_portfolios): self._build_portfolios_tab,
+            str(self.tab_transactions): self._build_transactions_tab,
+            str(self.tab_risk): self._build_risk_tab,
+            str(self.tab_diag): self._build_diag_tab,
+        }
+        notebook.bind("<<NotebookTabChanged>>", lambda e: self._on_tab_changed())
+        self._build_tab(notebook, notebook.select())
+
+    def _on_tab_changed(self):
+        tab = self.notebook.select()
+        self._build_tab(self.notebook, tab)
+        if tab == str(self.tab_transactions) and self.tx_poller is not None:
+            self.tx_poller.poke()  # catch up right away instead of at the hidden-tab cadence
+
+    def _build_tab(self, notebook, tab):
+        build = self._tab_builders.pop(tab, None)
+        if build is None:
+            return
+        t0 = time.perf_counter()
+        build()
+        self.tab_build_ms[notebook.tab(tab, "text")] = (time.perf_counter() - t0) * 1000
+
+    def _status_label(self, parent, tab):
+        """Label showing loading / error state for background jobs of `tab`."""
+        lbl = Label(parent, text="", bg="#222222", fg="#e0e0e0")
+        lbl.pack(side=LEFT, padx=10)
+        self.jobs.register_status(tab, lbl)
+        return lbl
+
+    def _search_entry(self, parent):
+        """Type-ahead search box; every keystroke filters the tab's table from memory."""
+        Label(parent, text="Search:", bg="#222222", fg="#e0e0e0").pack(side=LEFT, padx=(15, 5))
+        ent = Entry(parent, width=24)
+        ent.pack(side=LEFT)
+        return ent
+
+    def _search_label(self, parent):
+        lbl = Label(parent, text="", bg="#222222", fg="#888888")
+        lbl.pack(side=LEFT, padx=10)
+        return lbl
+
+    def _paged_table(self, parent, tab, query, ttl, tags, **tree_kw):
+        """PagedTable over `query` whose pages go through the result cache."""
+        fetch = functools.partial(fetch_all, ttl=ttl, tags=tags)
+        return PagedTable(parent, self.jobs, tab, query, fetch,
+                          page_size=PAGE_SIZE, max_rows=MAX_TABLE_ROWS, **tree_kw)
+
+    def _stream_into_tree(self, tab, tree, query, params=None, **cache):
+        """Fill `tree` chunk by chunk from stream_rows(), so the first rows show right away.
+
+        At most two chunks are in flight between the worker and the Tk
+        thread; a newer stream into the same tree stops this one, killing
+        its statement if it is still running on the server.
+        """
+        stream_id = self._tree_streams.get(tree, 0) + 1
+        self._tree_streams[tree] = stream_id
+        slots = threading.Semaphore(2)
+
+        def current():
+            return self._tree_streams.get(tree) == stream_id
+
+        def work():
+            first = True
+            with closing(stream_rows(query, params, **cache)) as chunks:
+                for cols, rows in chunks:
+                    while not slots.acquire(timeout=0.5):
+                        if not current():
+                            return
+                    if not current():
+                        return
+                    self.jobs.post(self._append_chunk, tree, stream_id, cols, rows, first, slots)
+                    first = False
+            self.jobs.post(self._end_stream, tree, stream_id)
+
+        self.requests.submit(("stream", str(tree)), None, work, tab=tab)
+
+    def _append_chunk(self, tree, stream_id, cols, rows, first, slots):
+        slots.release()
+        if self._tree_streams.get(tree) != stream_id:
+            return
+        binding = self._bindings[tree]
+        if first:
+            binding.begin(cols)
+        binding.feed(rows)
 
-        self._build_dashboard_tab()
-        self._build_users_tab()
-        self._build_portfolios_tab()
-        self._build_transactions_tab()
-        self._build_risk_tab()
+    def _end_stream(self, tree, stream_id):
+        if self._tree_streams.get(tree) == stream_id:
+            self._bindings[tree].end()
+
+    def _fill_tree(self, tree, cols, rows):
+        """Show `rows` in `tree`, changing only the rows that differ from what is shown."""
+        self._bindings[tree].update(cols, rows)
 
     # =========================
     # DASHBOARD TAB
@@ -126,24 +621,49 @@ class PortfolioApp(Tk):
         self.ent_dash_ticker = Entry(frm_top, width=10)
         self.ent_dash_ticker.pack(side=LEFT)
 
+        Label(frm_top, text="From:", bg="#222222", fg="#e0e0e0").pack(side=LEFT, padx=5)
+        self.ent_dash_from = Entry(frm_top, width=11)
+        self.ent_dash_from.pack(side=LEFT)
+        Label(frm_top, text="To:", bg="#222222", fg="#e0e0e0").pack(side=LEFT, padx=5)
+        self.ent_dash_to = Entry(frm_top, width=11)
+        self.ent_dash_to.pack(side=LEFT)
+
         ttk.Button(frm_top, text="Load Dashboard", command=self.load_dashboard).pack(side=LEFT, padx=5)
+        self._status_label(frm_top, "dashboard")
+        self.lbl_dash_redraw = Label(frm_top, text="", bg="#222222", fg="#888888")
+        self.lbl_dash_redraw.pack(side=RIGHT, padx=10)
 
         self.lbl_dash_summary = Label(self.tab_dashboard, text="", bg="#222222",
                                       fg="#e0e0e0", justify=LEFT, font=("Segoe UI", 10))
         self.lbl_dash_summary.pack(anchor="w", padx=10, pady=5)
 
-        # charts frame
-        frm_charts = Frame(self.tab_dashboard, bg="#222222")
-        frm_charts.pack(fill=BOTH, expand=True)
-
-        # Figure: 2x2 grid
+        # charts frame; the figure is created by the first load
+        self.frm_dash_charts = Frame(self.tab_dashboard, bg="#222222")
+        self.frm_dash_charts.pack(fill=BOTH, expand=True)
+        self.lbl_dash_hint = Label(self.frm_dash_charts, bg="#222222", fg="#888888",
+                                   text="Enter a portfolio ID and click Load Dashboard.")
+        self.lbl_dash_hint.pack(pady=40)
+        self.panel_dash = None
+
+    def _build_dashboard_charts(self):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from matplotlib.figure import Figure
+        from charts import ChartPanel, DashboardFigure
+
+        self.lbl_dash_hint.destroy()
+        frm_charts = self.frm_dash_charts
         self.fig_dash = Figure(figsize=(9, 5), dpi=100)
-        self.ax_alloc = self.fig_dash.add_subplot(221)  # pie allocation
-        self.ax_pl    = self.fig_dash.add_subplot(222)  # bar P/L
-        self.ax_price = self.fig_dash.add_subplot(212)  # line price history
+        # artists are created once and updated in place on every load
+        self.dash_fig = DashboardFigure(
+            self.fig_dash, PRICE_MARKER_LIMIT,
+            no_ticker_message="Enter a ticker and click Load Dashboard\nto see price history.")
 
         self.canvas_dash = FigureCanvasTkAgg(self.fig_dash, master=frm_charts)
+        # toolbar zoom/pan on the price chart re-samples the visible range
+        NavigationToolbar2Tk(self.canvas_dash, frm_charts)
         self.canvas_dash.get_tk_widget().pack(fill=BOTH, expand=True)
+        self.panel_dash = ChartPanel(self.fig_dash, self.canvas_dash,
+                                     on_draw=lambda ms: self._show_redraw(self.lbl_dash_redraw, ms))
 
     def load_dashboard(self):
         pid = self.ent_dash_portfolio.get().strip()
@@ -154,85 +674,55 @@ class PortfolioApp(Tk):
             return
         pid = int(pid)
 
-        # ---------- holdings for the portfolio ----------
-        h_cols, holdings = fetch_all(
-            "SELECT tickerSymbol, bookCost, marketValue, profitAndLoss "
-            "FROM UserDefinedHoldingPerformance WHERE portfolioID = %s",
-            (pid,)
-        )
-        if not holdings:
+        try:
+            start, end = [date.fromisoformat(v) if v else None
+                          for v in (self.ent_dash_from.get().strip(),
+                                    self.ent_dash_to.get().strip())]
+        except ValueError:
+            messagebox.showwarning("Input", "Enter dates as YYYY-MM-DD (or leave them empty).")
+            return
+
+        self.requests.submit("dashboard", ("dashboard", pid, ticker, start, end),
+                             self._fetch_dashboard, pid, ticker, start, end,
+                             on_done=self._render_dashboard)
+
+    @staticmethod
+    def _fetch_dashboard(pid, ticker, start=None, end=None):
+        """Worker side of load_dashboard: one round trip, summary computed client-side."""
+        from dashboard_data import dashboard_statements, load_dashboard_data
+
+        # without snapshots the value series is left empty (the chart says why)
+        built = snapshots_built()
+        sql = ";\n".join(s[0] for s in dashboard_statements(pid, ticker, start, end, built))
+        with STATS.trace(sql) as t:
+            def load():
+                with POOL.connection() as conn:
+                    t.lap("connect")
+                    return load_dashboard_data(conn, pid, ticker, start, end, trace=t,
+                                               use_snapshots=built)
+            data = CACHE.get_or_load(("dashboard", pid, ticker, start, end, built), load,
+                                     CACHE_TTL["dashboard"], [("portfolio", pid)])
+            t.rows = len(data.holdings) + len(data.prices[0]) + len(data.values[0])
+            return data
+
+    def _render_dashboard(self, data):
+        from dashboard_data import summary_text
+
+        self._start_snapshot_timer()  # the fetch may have found them built
+        if self.panel_dash is None:
+            self._build_dashboard_charts()
+        if not data.holdings:
             self.lbl_dash_summary.config(text="No holdings for this portfolio.")
-            self.ax_alloc.clear()
-            self.ax_pl.clear()
-            self.ax_price.clear()
-            self.canvas_dash.draw()
+            self.dash_fig.clear()
+            self.panel_dash.redraw()
             return
 
-        # summary row
-        sum_cols, summary = fetch_all(
-            "SELECT portfolioID, "
-            "SUM(bookCost) AS bookValue, "
-            "SUM(marketValue) AS marketValue, "
-            "SUM(profitAndLoss) AS profitAndLoss, "
-            "(SUM(profitAndLoss)/NULLIF(SUM(bookCost),0))*100 AS totalPercentGain "
-            "FROM UserDefinedHoldingPerformance "
-            "WHERE portfolioID = %s GROUP BY portfolioID",
-            (pid,)
-        )
-        if summary:
-            _, book, market, pl, pct = summary[0]
-            txt = (f"Portfolio {pid}\n"
-                   f"Book Value: {book:.2f}\n"
-                   f"Market Value: {market:.2f}\n"
-                   f"Profit / Loss: {pl:.2f}\n"
-                   f"Total % Gain: {pct:.2f}%")
-            self.lbl_dash_summary.config(text=txt)
-
-        # ---------- Pie chart: allocation ----------
-        tickers = [r[0] for r in holdings]
-        mvals   = [float(r[2]) for r in holdings]
-
-        self.ax_alloc.clear()
-        self.ax_alloc.pie(mvals, labels=tickers, autopct="%1.1f%%")
-        self.ax_alloc.set_title("Allocation by Market Value")
-
-        # ---------- Bar chart: P/L per holding ----------
-        pls = [float(r[3]) for r in holdings]
-        self.ax_pl.clear()
-        self.ax_pl.bar(tickers, pls)
-        self.ax_pl.set_title("Profit / Loss by Holding")
-        self.ax_pl.set_xticklabels(tickers, rotation=45, ha="right")
-
-        # ---------- Line chart: price history for selected ticker ----------
-        self.ax_price.clear()
-        if ticker:
-            ph_cols, prices = fetch_all(
-                "SELECT transactionDate, marketPricePerShare "
-                "FROM TransactionRecord "
-                "WHERE portfolioID = %s AND tickerSymbol = %s "
-                "ORDER BY transactionDate",
-                (pid, ticker)
-            )
-            if prices:
-                dates = [p[0] for p in prices]
-                vals  = [float(p[1]) for p in prices]
-                self.ax_price.plot(dates, vals, marker="o")
-                self.ax_price.set_title(f"Price History for {ticker} (portfolio {pid})")
-                self.ax_price.set_xlabel("Date")
-                self.ax_price.set_ylabel("Price")
-                self.ax_price.tick_params(axis='x', rotation=45)
-            else:
-                self.ax_price.text(0.5, 0.5,
-                                   f"No price history for {ticker} in portfolio {pid}.",
-                                   transform=self.ax_price.transAxes,
-                                   ha="center", va="center", color="white")
-        else:
-            self.ax_price.text(0.5, 0.5,
-                               "Enter a ticker and click Load Dashboard\nto see price history.",
-                               transform=self.ax_price.transAxes,
-                               ha="center", va="center", color="white")
-        self.fig_dash.tight_layout()
-        self.canvas_dash.draw()
+        self.lbl_dash_summary.config(text=summary_text(data.pid, data.summary))
+        self.panel_dash.redraw(self.dash_fig.show(data))
+
+    @staticmethod
+    def _show_redraw(label, ms):
+        label.config(text=f"Redraw {ms:.1f} ms")
 
     # =========================
     # USERS TAB (UserProfile)
@@ -243,24 +733,25 @@ class PortfolioApp(Tk):
 
         ttk.Button(frm_top, text="Refresh Users", command=self.load_users).pack(side=LEFT, padx=5)
         ttk.Button(frm_top, text="Delete Selected User", command=self.delete_user).pack(side=LEFT, padx=5)
-
-        self.tree_users = ttk.Treeview(self.tab_users, show="headings")
-        self.tree_users.pack(fill=BOTH, expand=True, padx=5, pady=5)
+        ent_search = self._search_entry(frm_top)
+        self._status_label(frm_top, "users")
+        lbl_search = self._search_label(frm_top)
+
+        self.tbl_users = self._paged_table(
+            self.tab_users, "users",
+            USERS_QUERY,
+            ttl=CACHE_TTL["users"], tags=[("table", "UserProfile")])
+        self.tbl_users.pack(fill=BOTH, expand=True, padx=5, pady=5)
+        self.tree_users = self.tbl_users.tree
+        self.users_filter = TypeAheadFilter(
+            ent_search, self.tbl_users,
+            functools.partial(load_search_index, USERS_QUERY, USERS_SEARCH_FIELDS),
+            limit=SEARCH_LIMIT, on_status=lambda text: lbl_search.config(text=text))
 
         self.load_users()
 
     def load_users(self):
-        cols, rows = fetch_all("SELECT userID, fName, lName, dateOfBirth FROM UserProfile;")
-        if not cols:
-            return
-        self.tree_users.delete(*self.tree_users.get_children())
-        self.tree_users["columns"] = cols
-        self.tree_users.column("#0", width=0, stretch=NO)
-        for c in cols:
-            self.tree_users.heading(c, text=c)
-            self.tree_users.column(c, width=120)
-        for r in rows:
-            self.tree_users.insert("", END, values=r)
+        self.users_filter.refresh()
 
     def delete_user(self):
         sel = self.tree_users.selection()
@@ -268,15 +759,18 @@ class PortfolioApp(Tk):
             messagebox.showwarning("Select", "Select a user row.")
             return
         vals = self.tree_users.item(sel[0], "values")
-        user_id = vals[0]
+        user_id = int(vals[0])
         if not messagebox.askyesno("Confirm", f"Delete user {user_id}? "
                                               "Ensure cascading FKs are set or cleanup manually."):
             return
 
-        ok = execute_action("DELETE FROM UserProfile WHERE userID = %s", (user_id,))
-        if ok:
-            self.load_users()
-            messagebox.showinfo("Deleted", f"User {user_id} deleted.")
+        self.jobs.submit("users", delete_user_cascade, user_id,
+                         on_done=lambda _: self._user_deleted(user_id))
+
+    def _user_deleted(self, user_id):
+        self.users_filter.remove(user_id)
+        self.load_users()
+        messagebox.showinfo("Deleted", f"User {user_id} deleted.")
 
     # =========================
     # PORTFOLIOS TAB
@@ -292,30 +786,33 @@ class PortfolioApp(Tk):
         self.ent_portfolio_filter = Entry(frm_top, width=8)
         self.ent_portfolio_filter.pack(side=LEFT)
         ttk.Button(frm_top, text="View Holdings", command=self.show_portfolio_holdings).pack(side=LEFT, padx=5)
+        ent_search = self._search_entry(frm_top)
+        self._status_label(frm_top, "portfolios")
+        lbl_search = self._search_label(frm_top)
 
         frm_tables = Frame(self.tab_portfolios, bg="#222222")
         frm_tables.pack(fill=BOTH, expand=True)
 
-        self.tree_portfolios = ttk.Treeview(frm_tables, show="headings", height=8)
-        self.tree_portfolios.pack(fill=X, padx=5, pady=5)
+        self.tbl_portfolios = self._paged_table(
+            frm_tables, "portfolios",
+            PORTFOLIOS_QUERY,
+            ttl=CACHE_TTL["portfolios"], tags=[("table", "Portfolio")], height=8)
+        self.tbl_portfolios.pack(fill=X, padx=5, pady=5)
+        self.tree_portfolios = self.tbl_portfolios.tree
+        self.tree_portfolios.bind("<Double-1>", lambda e: self._view_selected_portfolio())
+        self.portfolios_filter = TypeAheadFilter(
+            ent_search, self.tbl_portfolios,
+            functools.partial(load_search_index, PORTFOLIOS_QUERY, PORTFOLIOS_SEARCH_FIELDS),
+            limit=SEARCH_LIMIT, on_status=lambda text: lbl_search.config(text=text))
 
         self.tree_holdings = ttk.Treeview(frm_tables, show="headings")
         self.tree_holdings.pack(fill=BOTH, expand=True, padx=5, pady=5)
+        self._bindings[self.tree_holdings] = TableBinding(self.tree_holdings, ["tickerSymbol"])
 
         self.load_portfolios()
 
     def load_portfolios(self):
-        cols, rows = fetch_all("SELECT portfolioID, baseCurrency, userID FROM Portfolio;")
-        if not cols:
-            return
-        self.tree_portfolios.delete(*self.tree_portfolios.get_children())
-        self.tree_portfolios["columns"] = cols
-        self.tree_portfolios.column("#0", width=0, stretch=NO)
-        for c in cols:
-            self.tree_portfolios.heading(c, text=c)
-            self.tree_portfolios.column(c, width=120)
-        for r in rows:
-            self.tree_portfolios.insert("", END, values=r)
+        self.portfolios_filter.refresh()
 
     def delete_portfolio(self):
         sel = self.tree_portfolios.selection()
@@ -323,37 +820,40 @@ class PortfolioApp(Tk):
             messagebox.showwarning("Select", "Select a portfolio row.")
             return
         vals = self.tree_portfolios.item(sel[0], "values")
-        pid = vals[0]
+        pid = int(vals[0])
         if not messagebox.askyesno("Confirm", f"Delete portfolio {pid}? "
                                               "Ensure FKs cascade to holdings/transactions."):
             return
-        ok = execute_action("DELETE FROM Portfolio WHERE portfolioID = %s", (pid,))
-        if ok:
-            self.load_portfolios()
-            self.tree_holdings.delete(*self.tree_holdings.get_children())
-            messagebox.showinfo("Deleted", f"Portfolio {pid} deleted.")
+        self.jobs.submit("portfolios", execute_action,
+                         "DELETE FROM Portfolio WHERE portfolioID = %s", (pid,),
+                         invalidates=[("portfolio", pid), ("table", "Portfolio"),
+                                      ("table", "TransactionRecord"), ("risk",)],
+                         on_done=lambda _: self._portfolio_deleted(pid))
+
+    def _portfolio_deleted(self, pid):
+        self.portfolios_filter.remove(pid)
+        self.load_portfolios()
+        self._tree_streams.pop(self.tree_holdings, None)
+        self.requests.supersede(("stream", str(self.tree_holdings)))
+        self._bindings[self.tree_holdings].clear()
+        messagebox.showinfo("Deleted", f"Portfolio {pid} deleted.")
+
+    def _view_selected_portfolio(self):
+        sel = self.tree_portfolios.selection()
+        if not sel:
+            return
+        self.ent_portfolio_filter.delete(0, END)
+        self.ent_portfolio_filter.insert(0, self.tree_portfolios.item(sel[0], "values")[0])
+        self.show_portfolio_holdings()
 
     def show_portfolio_holdings(self):
         pid = self.ent_portfolio_filter.get().strip()
         if not pid.isdigit():
             messagebox.showwarning("Input", "Enter a valid portfolio ID.")
             return
-        cols, rows = fetch_all(
-            "SELECT tickerSymbol, quantityOwned, bookCost, marketValue, "
-            "profitAndLoss, percentGain "
-            "FROM UserDefinedHoldingPerformance WHERE portfolioID = %s",
-            (pid,)
-        )
-        if not cols:
-            return
-        self.tree_holdings.delete(*self.tree_holdings.get_children())
-        self.tree_holdings["columns"] = cols
-        self.tree_holdings.column("#0", width=0, stretch=NO)
-        for c in cols:
-            self.tree_holdings.heading(c, text=c)
-            self.tree_holdings.column(c, width=120)
-        for r in rows:
-            self.tree_holdings.insert("", END, values=r)
+        pid = int(pid)
+        self._stream_into_tree("portfolios", self.tree_holdings, HOLDINGS_PERFORMANCE_SQL, (pid,),
+                               ttl=CACHE_TTL["holdings"], tags=[("portfolio", pid)])
 
     # =========================
     # TRANSACTIONS TAB
@@ -376,18 +876,61 @@ class PortfolioApp(Tk):
                    command=self.insert_transaction).grid(row=len(labels), column=0,
                                                          columnspan=2, pady=5)
 
-        ttk.Button(self.tab_transactions, text="View Recent Transactions",
-                   command=self.view_transactions).pack(pady=5)
-        self.tree_tx = ttk.Treeview(self.tab_transactions, show="headings")
-        self.tree_tx.pack(fill=BOTH, expand=True, padx=5, pady=5)
+        frm_view = Frame(self.tab_transactions, bg="#222222")
+        frm_view.pack(pady=5)
+        ttk.Button(frm_view, text="View Recent Transactions",
+                   command=self.view_transactions).pack(side=LEFT)
+        ttk.Button(frm_view, text="Import File...",
+                   command=self.import_transactions).pack(side=LEFT, padx=5)
+        self._status_label(frm_view, "transactions")
+        self.lbl_import = Label(frm_view, text="", bg="#222222", fg="#e0e0e0")
+        self.lbl_import.pack(side=LEFT, padx=10)
+        self.lbl_tx_live = Label(frm_view, text="", bg="#222222", fg="#888888")
+        self.lbl_tx_live.pack(side=LEFT, padx=10)
+        if self.tx_queue is not None:
+            ttk.Button(frm_view, text="Flush Queue",
+                       command=self.tx_queue.flush_now).pack(side=LEFT, padx=5)
+            self.lbl_tx_queue = Label(frm_view, text=self._queue_text, bg="#222222", fg="#888888")
+            self.lbl_tx_queue.pack(side=LEFT, padx=10)
+
+        self.tbl_tx = self._paged_table(
+            self.tab_transactions, "transactions", TRANSACTIONS_QUERY,
+            ttl=CACHE_TTL["transactions"], tags=[("table", "TransactionRecord")])
+        self.tbl_tx.pack(fill=BOTH, expand=True, padx=5, pady=5)
+        self.tree_tx = self.tbl_tx.tree
+
+        # new trades from other desks are merged in without reloading the table
+        self.tx_poller = DeltaPoller(
+            self.tbl_tx, fetch_new_transactions, **LIVE_POLL,
+            active=lambda: self.notebook.select() == str(self.tab_transactions) and self.user_active(),
+            on_status=lambda text: self.lbl_tx_live.config(text=text))
+        self.view_transactions()
+        self.tx_poller.start()
 
     def insert_transaction(self):
         tid, pid, ticker, invtype, mprice, sprice, qty = [e.get().strip() for e in self.ent_tx]
         if not (tid and pid and ticker and invtype and mprice and qty):
             messagebox.showwarning("Input", "Fill in required fields (sale price can be empty).")
             return
+        if not pid.isdigit():
+            messagebox.showwarning("Input", "Enter a valid portfolio ID.")
+            return
         sprice_val = None if sprice == "" else sprice
 
+        if self.tx_queue is not None:
+            record = {"transactionID": tid, "portfolioID": pid, "tickerSymbol": ticker,
+                      "investmentType": invtype, "marketPricePerShare": mprice,
+                      "salePricePerShare": sprice_val, "quantity": qty,
+                      # the entry date, however late the row reaches the server
+                      "transactionDate": date.today().isoformat()}
+            try:
+                parse_record(record)
+            except ValueError as e:
+                messagebox.showwarning("Input", str(e))
+                return
+            self.tx_queue.put(record)  # journaled; the status label tracks the flush
+            return
+
         query = """
         INSERT INTO TransactionRecord
         (transactionID, portfolioID, tickerSymbol, investmentType,
@@ -395,27 +938,72 @@ class PortfolioApp(Tk):
         VALUES (%s,%s,%s,%s,%s,%s,%s,CURDATE())
         """
         params = (tid, pid, ticker, invtype, mprice, sprice_val, qty)
-        if execute_action(query, params):
-            messagebox.showinfo("Success", "Transaction inserted.")
-            self.view_transactions()
+        self.jobs.submit("transactions", execute_action, query, params,
+                         # risk results are keyed by user, so drop them all
+                         invalidates=[("portfolio", int(pid)),
+                                      ("table", "TransactionRecord"), ("risk",)],
+                         on_done=lambda _: self._transaction_inserted(tid))
+
+    def _transaction_inserted(self, tid):
+        messagebox.showinfo("Success", "Transaction inserted.")
+        self.refresh_snapshots()
+        watermark = self.tx_poller.watermark
+        if tid.isdigit() and watermark is not None and int(tid) > watermark:
+            self.tx_poller.poke()  # just the new row
+        else:
+            self.view_transactions()  # below the watermark: the poller would miss it
+
+    def _show_queue_status(self, text):
+        self._queue_text = text
+        if self.lbl_tx_queue is not None:
+            self.lbl_tx_queue.config(text=text, fg="#ff6666" if self.tx_queue.error else "#888888")
+
+    def _transactions_flushed(self, records, rejected):
+        """The write-behind queue wrote `records`; show them and report `rejected` ones."""
+        if records:
+            self.refresh_snapshots()
+        if records and self.tx_poller is not None:
+            watermark = self.tx_poller.watermark
+            if watermark is not None and all(int(r["transactionID"]) > watermark for r in records):
+                self.tx_poller.poke()  # just the new rows
+            else:
+                self.view_transactions()
+        if rejected:
+            messagebox.showwarning("Queued transactions rejected", "\n".join(
+                f"transaction {r['transactionID']}: {msg}" for r, msg in rejected[:10]))
 
     def view_transactions(self):
-        cols, rows = fetch_all(
-            "SELECT transactionID, portfolioID, tickerSymbol, investmentType, "
-            "marketPricePerShare, salePricePerShare, quantity, transactionDate "
-            "FROM TransactionRecord "
-            "ORDER BY transactionDate DESC, transactionID DESC LIMIT 100"
-        )
-        if not cols:
+        self.tbl_tx.reload()
+
+    def import_transactions(self):
+        path = filedialog.askopenfilename(
+            title="Import transactions",
+            filetypes=[("CSV / JSON Lines", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+        if not path:
             return
-        self.tree_tx.delete(*self.tree_tx.get_children())
-        self.tree_tx["columns"] = cols
-        self.tree_tx.column("#0", width=0, stretch=NO)
-        for c in cols:
-            self.tree_tx.heading(c, text=c)
-            self.tree_tx.column(c, width=120)
-        for r in rows:
-            self.tree_tx.insert("", END, values=r)
+        self.lbl_import.config(text="Importing...")
+        self.jobs.submit("transactions", self._run_import, path,
+                         on_done=self._import_finished)
+
+    def _run_import(self, path):
+        """Worker side of import_transactions; progress is posted back to the Tk thread."""
+        def progress(report):
+            self.jobs.post(self.lbl_import.config, {"text": report.summary()})
+        with POOL.connection() as conn:
+            report = import_transactions(conn, path, IMPORT_BATCH_SIZE, on_progress=progress)
+        CACHE.invalidate(("table", "TransactionRecord"), ("risk",),
+                         *[("portfolio", pid) for pid in report.portfolios])
+        return report
+
+    def _import_finished(self, report):
+        self.lbl_import.config(text=report.summary())
+        msg = report.summary()
+        if report.errors:
+            msg += "\n\nFirst errors:\n" + "\n".join(
+                f"line {line_no}: {err}" for line_no, err in report.errors[:10])
+        messagebox.showinfo("Import", msg)
+        self.view_transactions()
+        self.refresh_snapshots()
 
     # =========================
     # RISK TAB (pies + table)
@@ -427,18 +1015,29 @@ class PortfolioApp(Tk):
         Label(frm_top, text="User ID:", bg="#222222", fg="#e0e0e0").pack(side=LEFT, padx=5)
         self.ent_risk_user = Entry(frm_top, width=8)
         self.ent_risk_user.pack(side=LEFT)
+        self.lbl_risk_redraw = Label(frm_top, text="", bg="#222222", fg="#888888")
+        self.lbl_risk_redraw.pack(side=RIGHT, padx=10)
 
-        ttk.Button(frm_top, text="Run GetRiskAnalysis",
+        ttk.Button(frm_top, text="Run Risk Analysis",
                    command=self.run_risk).pack(side=LEFT, padx=5)
+        self._status_label(frm_top, "risk")
 
         # table
         self.tree_risk = ttk.Treeview(self.tab_risk, show="headings", height=10)
         self.tree_risk.pack(fill=X, padx=5, pady=5)
+        self._bindings[self.tree_risk] = TableBinding(self.tree_risk, ["modelRiskCategory"])
 
-        # charts
-        frm_charts = Frame(self.tab_risk, bg="#222222")
-        frm_charts.pack(fill=BOTH, expand=True)
+        # charts; the figure is created by the first run
+        self.frm_risk_charts = Frame(self.tab_risk, bg="#222222")
+        self.frm_risk_charts.pack(fill=BOTH, expand=True)
+        self.panel_risk = None
 
+    def _build_risk_charts(self):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from charts import ChartPanel, PieChart
+
+        frm_charts = self.frm_risk_charts
         self.fig_risk = Figure(figsize=(8, 4), dpi=100)
         self.ax_actual = self.fig_risk.add_subplot(121)  # actual allocation pie
         self.ax_ideal  = self.fig_risk.add_subplot(122)  # ideal allocation pie
@@ -446,6 +1045,11 @@ class PortfolioApp(Tk):
         self.canvas_risk = FigureCanvasTkAgg(self.fig_risk, master=frm_charts)
         self.canvas_risk.get_tk_widget().pack(fill=BOTH, expand=True)
 
+        self.chart_actual = PieChart(self.ax_actual, "Actual Allocation by Risk Category")
+        self.chart_ideal = PieChart(self.ax_ideal, "Ideal Allocation by Risk Category")
+        self.panel_risk = ChartPanel(self.fig_risk, self.canvas_risk,
+                                     on_draw=lambda ms: self._show_redraw(self.lbl_risk_redraw, ms))
+
     def run_risk(self):
         uid = self.ent_risk_user.get().strip()
         if not uid.isdigit():
@@ -453,86 +1057,208 @@ class PortfolioApp(Tk):
             return
         uid = int(uid)
 
-        conn = get_conn()
-        if not conn:
+        # the single-user view of the batch engine (python risk_engine.py)
+        self.requests.submit("risk", ("risk", uid), fetch_risk, uid, on_done=self._render_risk)
+
+    def _render_risk(self, result):
+        from risk_engine import GROUP_COLUMNS, user_allocation, user_table
+
+        cols, rows, risk = result
+        if not cols:
+            messagebox.showinfo("Risk", "No risk data returned.")
+            return
+        if risk is not None and not len(risk.users):
+            messagebox.showinfo("Risk", "No holdings for this user.")
             return
-        try:
-            cur = conn.cursor()
-            # assuming procedure signature: GetRiskAnalysis(IN p_userID INT)
-            cur.callproc("GetRiskAnalysis", (uid,))
-
-            all_rows = []
-            all_cols = None
-            for result in cur.stored_results():
-                rows = result.fetchall()
-                cols = [d[0] for d in result.description]
-                all_rows = rows
-                all_cols = cols
-                break  # only first result set
-
-            if not all_cols:
-                messagebox.showinfo("Risk", "No risk data returned.")
-                return
 
-            # populate table
-            self.tree_risk.delete(*self.tree_risk.get_children())
-            self.tree_risk["columns"] = all_cols
-            self.tree_risk.column("#0", width=0, stretch=NO)
-            for c in all_cols:
-                self.tree_risk.heading(c, text=c)
-                self.tree_risk.column(c, width=120)
-            for r in all_rows:
-                self.tree_risk.insert("", END, values=r)
-
-            # -------- build pie charts from result --------
-            # we assume columns: modelRiskCategory, actualPct, idealPct
-            # based on our earlier GetRiskAnalysis design
-            idx_cat = all_cols.index("modelRiskCategory") if "modelRiskCategory" in all_cols else None
-            idx_act = all_cols.index("actualPct") if "actualPct" in all_cols else None
-            idx_ideal = all_cols.index("idealPct") if "idealPct" in all_cols else None
-
-            if idx_cat is None or idx_act is None or idx_ideal is None:
-                # can't plot if columns missing
-                self.ax_actual.clear()
-                self.ax_ideal.clear()
-                self.ax_actual.text(0.5, 0.5, "modelRiskCategory / actualPct / idealPct\nnot found in result.",
-                                    transform=self.ax_actual.transAxes,
-                                    ha="center", va="center", color="white")
-                self.ax_ideal.axis("off")
-                self.canvas_risk.draw()
-                return
+        # populate table
+        self._fill_tree(self.tree_risk, *(user_table(risk, 0) if risk is not None else (cols, rows)))
+        if self.panel_risk is None:
+            self._build_risk_charts()
+
+        if risk is None:
+            # can't plot if columns missing
+            self.chart_actual.clear(f"{' or '.join(GROUP_COLUMNS)} / actualPct / idealPct\n"
+                                    "not found in result.")
+            self.chart_ideal.clear()
+            self.panel_risk.redraw()
+            return
+        labels, actual_vals, ideal_vals = user_allocation(risk, 0)
 
-            # aggregate by category
-            agg_actual = {}
-            agg_ideal = {}
-            for row in all_rows:
-                cat = row[idx_cat] or "Unknown"
-                act = float(row[idx_act]) if row[idx_act] is not None else 0.0
-                ideal = float(row[idx_ideal]) if row[idx_ideal] is not None else 0.0
-                agg_actual[cat] = agg_actual.get(cat, 0.0) + act
-                agg_ideal[cat]  = agg_ideal.get(cat, 0.0) + ideal
-
-            labels = list(agg_actual.keys())
-            actual_vals = [agg_actual[l] for l in labels]
-            ideal_vals  = [agg_ideal.get(l, 0.0) for l in labels]
-
-            self.ax_actual.clear()
-            self.ax_actual.pie(actual_vals, labels=labels, autopct="%1.1f%%")
-            self.ax_actual.set_title("Actual Allocation by Risk Category")
-
-            self.ax_ideal.clear()
-            self.ax_ideal.pie(ideal_vals, labels=labels, autopct="%1.1f%%")
-            self.ax_ideal.set_title("Ideal Allocation by Risk Category")
-
-            self.fig_risk.tight_layout()
-            self.canvas_risk.draw()
-
-        except mysql.connector.Error as e:
-            messagebox.showerror("SQL Error", str(e))
-        finally:
-            conn.close()
+        relayout = self.chart_actual.update(labels, actual_vals)
+        relayout |= self.chart_ideal.update(labels, ideal_vals)
+        self.panel_risk.redraw(relayout)
+
+    # =========================
+    # DIAGNOSTICS TAB
+    # =========================
+    DIAG_REFRESH_MS = 2000
+
+    def _build_diag_tab(self):
+        frm_top = Frame(self.tab_diag, bg="#222222")
+        frm_top.pack(fill=X, pady=5)
+
+        ttk.Button(frm_top, text="Refresh", command=self.refresh_diagnostics).pack(side=LEFT, padx=5)
+        ttk.Button(frm_top, text="Reset", command=self.reset_diagnostics).pack(side=LEFT, padx=5)
+        ttk.Button(frm_top, text="Export JSON...",
+                   command=lambda: self.export_diagnostics(".json")).pack(side=LEFT, padx=5)
+        ttk.Button(frm_top, text="Export CSV...",
+                   command=lambda: self.export_diagnostics(".csv")).pack(side=LEFT, padx=5)
+        self._status_label(frm_top, "diagnostics")
+
+        self.lbl_diag_env = Label(self.tab_diag, text="", bg="#222222", fg="#e0e0e0",
+                                  justify=LEFT, font=("Consolas", 9))
+        self.lbl_diag_env.pack(anchor="w", padx=10)
+
+        # per-statement percentiles (ms); total = connect + execute + fetch
+        cols = ("Statement", "Count", "Cached", "Errors", "Rows", "p50", "p95", "p99", "Max",
+                "Connect p95", "Execute p95", "Fetch p95", "Render p95")
+        self.tree_diag = ttk.Treeview(self.tab_diag, show="headings", columns=cols, height=10)
+        for c in cols:
+            self.tree_diag.heading(c, text=c)
+            self.tree_diag.column(c, width=80, anchor="e")
+        self.tree_diag.column("Statement", width=420, anchor="w")
+        self.tree_diag.pack(fill=X, padx=5, pady=5)
+        self.tree_diag.bind("<<TreeviewSelect>>", lambda e: self._draw_histogram())
+        # keyed by statement: the item ID is the normalized SQL the histogram looks up
+        self._bindings[self.tree_diag] = TableBinding(self.tree_diag, ["Statement"], cols=cols)
+
+        frm_hist = Frame(self.tab_diag, bg="#222222")
+        frm_hist.pack(fill=X, padx=5)
+        self.lbl_diag_hist = Label(frm_hist, text="Select a statement to see its latency histogram.",
+                                   bg="#222222", fg="#e0e0e0", anchor="w")
+        self.lbl_diag_hist.pack(fill=X)
+        self.cnv_diag_hist = Canvas(frm_hist, height=140, bg="#333333", highlightthickness=0)
+        self.cnv_diag_hist.pack(fill=X, pady=3)
+
+        Label(self.tab_diag, text=f"Slow queries (>= {STATS.slow_ms} ms, newest first):",
+              bg="#222222", fg="#e0e0e0").pack(anchor="w", padx=10)
+        cols = ("At", "Total ms", "Connect", "Execute", "Fetch", "Render", "Rows", "Statement")
+        self.tree_slow = ttk.Treeview(self.tab_diag, show="headings", columns=cols)
+        for c in cols:
+            self.tree_slow.heading(c, text=c)
+            self.tree_slow.column(c, width=80, anchor="e")
+        self.tree_slow.column("At", width=140, anchor="w")
+        self.tree_slow.column("Statement", width=500, anchor="w")
+        self.tree_slow.pack(fill=BOTH, expand=True, padx=5, pady=5)
+        self._bindings[self.tree_slow] = TableBinding(self.tree_slow, cols=cols)
+
+        self._diag_tick()
+
+    def _diag_tick(self):
+        # only refresh while the tab is on screen
+        if self.notebook.select() == str(self.tab_diag):
+            self.refresh_diagnostics()
+        self._diag_after = self.after(self.DIAG_REFRESH_MS, self._diag_tick)
+
+    def diagnostics(self):
+        """Pool, cache, chart and startup numbers that go with the query stats."""
+        charts = {}
+        for name in ("panel_dash", "panel_risk"):
+            panel = getattr(self, name, None)
+            if panel is not None:
+                charts[name] = panel.stats()
+        return {"pool": POOL.stats(), "cache": CACHE.stats(), "requests": self.requests.stats(),
+                "charts": charts,
+                "startup_ms": self.startup_ms, "tab_build_ms": self.tab_build_ms}
+
+    def refresh_diagnostics(self):
+        extra = self.diagnostics()
+        pool, cache, req = extra["pool"], extra["cache"], extra["requests"]
+        lines = [
+            f"Pool:   {pool['open']} open, {pool['in_use']} in use, hit rate {pool['hit_rate']:.0%}, "
+            f"{pool['waits']} waits ({pool['wait_time']:.2f}s), {pool['timeouts']} timeouts, "
+            f"{pool['reconnects']} reconnects",
+            f"Cache:  {cache['entries']} entries, hit rate {cache['hit_rate']:.0%}, "
+            f"{cache['invalidated']} invalidated, {cache['evictions']} evicted",
+            f"Requests: {req['submitted']} run, {req['coalesced']} joined, "
+            f"{req['superseded']} superseded ({req['cancelled']} cancelled, "
+            f"{req['killed']} killed)",
+        ]
+        for name, c in extra["charts"].items():
+            if c["draws"]:
+                lines.append(f"Charts: {name} {c['draws']} draws, last {c['last_ms']:.1f} ms, "
+                             f"avg {c['avg_ms']:.1f} ms")
+        if self.startup_ms is not None:
+            lines.append(f"Startup: {self.startup_ms:.0f} ms")
+        self.lbl_diag_env.config(text="\n".join(lines))
+
+        fmt = lambda v: "" if v is None else f"{v:.1f}"
+        diag = self._bindings[self.tree_diag]
+        diag.update(diag.cols, [
+            (r["sql"], r["count"], r["cached"], r["errors"], r["rows"],
+             fmt(r["total_p50"]), fmt(r["total_p95"]), fmt(r["total_p99"]), fmt(r["max_ms"]),
+             fmt(r["connect_p95"]), fmt(r["execute_p95"]), fmt(r["fetch_p95"]),
+             fmt(r["render_p95"]))
+            for r in STATS.summary()])
+        self._draw_histogram()
+
+        slow = self._bindings[self.tree_slow]
+        slow.update(slow.cols, [
+            (q["at"], fmt(q["total_ms"]), fmt(q["phases"].get("connect")),
+             fmt(q["phases"].get("execute")), fmt(q["phases"].get("fetch")),
+             fmt(q["phases"].get("render")), q["rows"], q["sql"])
+            for q in STATS.slow_queries()])
+
+    def _draw_histogram(self):
+        cnv = self.cnv_diag_hist
+        cnv.delete("all")
+        sel = self.tree_diag.selection()
+        if not sel:
+            return
+        vals = self.tree_diag.item(sel[0], "values")
+        self.lbl_diag_hist.config(text=f"p50 {vals[5]} ms   p95 {vals[6]} ms   p99 {vals[7]} ms   "
+                                       f"({vals[1]} runs)   {sel[0]}")
+        buckets = STATS.histogram(sel[0])
+        peak = max(n for _, n in buckets) or 1
+        width = max(cnv.winfo_width(), 400)
+        bar_w = width / len(buckets)
+        height = int(cnv["height"])
+        for i, (bound, n) in enumerate(buckets):
+            x0 = i * bar_w + 4
+            top = height - 18 - (height - 36) * n / peak
+            cnv.create_rectangle(x0, top, x0 + bar_w - 8, height - 18, fill="#5555aa", outline="")
+            if n:
+                cnv.create_text(x0 + bar_w / 2 - 4, top - 8, text=str(n), fill="#e0e0e0")
+            label = f"<={bound}" if bound is not None else f">{buckets[-2][0]}"
+            cnv.create_text(x0 + bar_w / 2 - 4, height - 8, text=label + " ms",
+                            fill="#e0e0e0", font=("Segoe UI", 8))
+
+    def reset_diagnostics(self):
+        STATS.reset()
+        self.refresh_diagnostics()
+
+    def export_diagnostics(self, ext):
+        path = filedialog.asksaveasfilename(
+            title="Export diagnostics", defaultextension=ext,
+            filetypes=[("JSON", "*.json")] if ext == ".json" else [("CSV", "*.csv")])
+        if not path:
+            return
+        self.jobs.submit("diagnostics", STATS.dump, path, self.diagnostics(),
+                         on_done=lambda _: messagebox.showinfo("Export", f"Saved {path}"))
+
+
+def _report_startup(app):
+    """--startup-time: print how long the window took to come up, then quit."""
+    print(f"startup: {app.startup_ms:.0f} ms")
+    for tab, ms in app.tab_build_ms.items():
+        print(f"  build {tab}: {ms:.0f} ms")
+    print("  matplotlib imported: " + ("yes" if "matplotlib" in sys.modules else "no"))
+    print("  numpy imported: " + ("yes" if "numpy" in sys.modules else "no"))
+    app._on_close()
 
 
 if __name__ == "__main__":
+    # --stats-dump=PATH writes the query stats (JSON, or CSV for *.csv) on exit,
+    # so they can be collected from desktops without opening the Diagnostics tab
+    dump_path = next((a.split("=", 1)[1] for a in sys.argv[1:]
+                      if a.startswith("--stats-dump=")), None)
     app = PortfolioApp()
-    app.mainloop()
+    if "--startup-time" in sys.argv[1:]:
+        app.after_idle(_report_startup, app)  # queued after _mark_started
+    try:
+        app.mainloop()
+    finally:
+        if dump_path:
+            STATS.dump(dump_path, app.diagnostics())
+        POOL.close_all()
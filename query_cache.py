@@ -0,0 +1,113 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+# =========================
+# QUERY RESULT CACHE
+# =========================
+
+class QueryCache:
+    """Thread-safe LRU of query results with per-entry TTLs and tag invalidation.
+
+    Every entry carries a set of tags such as ("portfolio", 7) or
+    ("table", "UserProfile"); invalidate() drops all entries sharing a tag,
+    so writers can evict exactly what they made stale.
+    """
+
+    def __init__(self, max_entries=256, default_ttl=60.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (value, expires_at, tags); LRU first
+        self._by_tag = {}               # tag -> set of keys
+        self._epoch = 0                 # bumped on every invalidation
+        self._stats = {"hits": 0, "misses": 0, "expired": 0,
+                       "evictions": 0, "invalidated": 0}
+
+    @staticmethod
+    def key(query, params=None):
+        """Cache key for a SQL statement: whitespace-normalized text plus params."""
+        return " ".join(query.split()), tuple(params or ())
+
+    # ---------- lookups ----------
+    def get(self, key):
+        """Return (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            value, expires_at, _ = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, value
+
+    def get_or_load(self, key, loader, ttl=None, tags=()):
+        """Return the cached value for key, calling loader() to fill it on a miss."""
+        hit, value = self.get(key)
+        if hit:
+            return value
+        epoch = self.epoch()
+        value = loader()
+        self.put(key, value, ttl, tags, epoch=epoch)
+        return value
+
+    def epoch(self):
+        """Invalidation counter; pass it back to put() to skip storing a value loaded across one."""
+        with self._lock:
+            return self._epoch
+
+    def put(self, key, value, ttl=None, tags=(), epoch=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            # an invalidation ran while the value was loading: it may be stale
+            if epoch is not None and epoch != self._epoch:
+                return
+            if key in self._entries:
+                self._remove(key)
+            tags = frozenset(tags)
+            self._entries[key] = (value, time.monotonic() + ttl, tags)
+            for t in tags:
+                self._by_tag.setdefault(t, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    # ---------- invalidation ----------
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of `tags`."""
+        with self._lock:
+            self._epoch += 1
+            for t in tags:
+                for key in list(self._by_tag.get(t, ())):
+                    self._remove(key)
+                    self._stats["invalidated"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["entries"] = len(self._entries)
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return s
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for t in tags:
+            keys = self._by_tag.get(t)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[t]
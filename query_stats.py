@@ -0,0 +1,247 @@
+import csv
+import json
+import math
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+# =========================
+# QUERY INSTRUMENTATION
+# =========================
+
+PHASES = ("connect", "execute", "fetch", "render")
+
+# upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+HISTOGRAM_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """Statement shape used to group timings: literals and placeholders become ?, IN lists collapse."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return " ".join(sql.split())
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile (0-100) of an already sorted list; None if empty."""
+    if not sorted_values:
+        return None
+    k = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(k, len(sorted_values) - 1)]
+
+
+class QueryTrace:
+    """Timings of one statement execution, filled in phase by phase.
+
+    lap(phase) charges the time since the previous lap (or the start) to
+    `phase`; phase(name) is a context manager that charges its body.
+    A trace without an "execute" phase was answered from the cache.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.started_at = time.time()
+        self.phases = {}
+        self.rows = None
+        self.error = None
+        self._mark = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.add(phase, (now - self._mark) * 1000)
+        self._mark = now
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._mark = time.perf_counter()
+            self.add(name, (self._mark - t0) * 1000)
+
+    def add(self, phase, ms):
+        self.phases[phase] = self.phases.get(phase, 0.0) + ms
+
+    @property
+    def cached(self):
+        return "execute" not in self.phases
+
+    @property
+    def total_ms(self):
+        return sum(self.phases.values())
+
+    def as_dict(self):
+        return {"sql": self.key,
+                "at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+                "total_ms": round(self.total_ms, 3),
+                "phases": {p: round(ms, 3) for p, ms in self.phases.items()},
+                "rows": self.rows, "cached": self.cached, "error": self.error}
+
+
+class _KeyStats:
+    def __init__(self, window):
+        self.count = 0
+        self.cached = 0
+        self.errors = 0
+        self.rows = 0
+        self.max_ms = 0.0
+        self.samples = {p: deque(maxlen=window) for p in PHASES + ("total",)}
+
+
+class QueryStats:
+    """Thread-safe latency and row-count statistics per normalized statement.
+
+    Workers wrap each statement in trace(sql); the executor runs jobs through
+    captured() so the time spent rendering a job's result on the Tk thread
+    can be charged back to the statements that produced it. Percentiles are
+    computed over the last `window` executions of each statement, and
+    executions slower than `slow_ms` (all phases together) go to a bounded
+    slow-query log.
+    """
+
+    def __init__(self, slow_ms=500, window=1000, slow_log_size=200):
+        self.slow_ms = slow_ms
+        self.window = window
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._keys = {}                              # normalized sql -> _KeyStats
+        self._slow = deque(maxlen=slow_log_size)     # QueryTrace, oldest first
+        self._slow_ids = set()
+
+    # ---------- recording ----------
+    @contextmanager
+    def trace(self, sql):
+        """Time one execution of `sql`; recorded when the block exits, errors included."""
+        t = QueryTrace(normalize_sql(sql))
+        try:
+            yield t
+        except GeneratorExit:  # a streaming consumer stopped early
+            raise
+        except BaseException as e:
+            t.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._record(t)
+            traces = getattr(self._local, "traces", None)
+            if traces is not None:
+                traces.append(t)
+
+    def captured(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) and return (traces recorded by it on this thread, result)."""
+        outer = getattr(self._local, "traces", None)
+        self._local.traces = traces = []
+        try:
+            return traces, fn(*args, **kwargs)
+        finally:
+            self._local.traces = outer
+            if outer is not None:
+                outer.extend(traces)
+
+    def record_render(self, traces, ms):
+        """Charge `ms` of Tk-thread rendering to each of `traces`."""
+        with self._lock:
+            for t in traces:
+                t.add("render", ms)
+                ks = self._keys.get(t.key)
+                if ks is not None:
+                    ks.samples["render"].append(ms)
+                self._check_slow(t)
+
+    def _record(self, t):
+        total = t.total_ms
+        with self._lock:
+            ks = self._keys.get(t.key)
+            if ks is None:
+                ks = self._keys[t.key] = _KeyStats(self.window)
+            ks.count += 1
+            ks.cached += t.cached
+            ks.errors += t.error is not None
+            ks.rows += t.rows or 0
+            ks.max_ms = max(ks.max_ms, total)
+            for p, ms in t.phases.items():
+                ks.samples[p].append(ms)
+            ks.samples["total"].append(total)
+            self._check_slow(t)
+
+    def _check_slow(self, t):
+        if t.total_ms >= self.slow_ms and id(t) not in self._slow_ids:
+            if len(self._slow) == self._slow.maxlen:
+                self._slow_ids.discard(id(self._slow[0]))
+            self._slow.append(t)
+            self._slow_ids.add(id(t))
+
+    def reset(self):
+        with self._lock:
+            self._keys.clear()
+            self._slow.clear()
+            self._slow_ids.clear()
+
+    # ---------- reporting ----------
+    def summary(self):
+        """One dict per statement, most total time first, with p50/p95/p99 (ms) per phase."""
+        out = []
+        with self._lock:
+            items = [(k, ks, {p: sorted(s) for p, s in ks.samples.items()})
+                     for k, ks in self._keys.items()]
+        for key, ks, samples in items:
+            row = {"sql": key, "count": ks.count, "cached": ks.cached, "errors": ks.errors,
+                   "rows": ks.rows, "max_ms": round(ks.max_ms, 3),
+                   "sum_ms": round(sum(samples["total"]), 3)}
+            for p in ("total",) + PHASES:
+                for q in (50, 95, 99):
+                    v = percentile(samples[p], q)
+                    row[f"{p}_p{q}"] = None if v is None else round(v, 3)
+            out.append(row)
+        out.sort(key=lambda r: r["sum_ms"], reverse=True)
+        return out
+
+    def histogram(self, key, phase="total"):
+        """[(upper_bound_ms or None, count)] over HISTOGRAM_BOUNDS for one statement."""
+        with self._lock:
+            ks = self._keys.get(key)
+            values = list(ks.samples[phase]) if ks else []
+        counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        for v in values:
+            i = 0
+            while i < len(HISTOGRAM_BOUNDS) and v > HISTOGRAM_BOUNDS[i]:
+                i += 1
+            counts[i] += 1
+        return list(zip(HISTOGRAM_BOUNDS + (None,), counts))
+
+    def slow_queries(self):
+        """Slow-query log as dicts, newest first."""
+        with self._lock:
+            return [t.as_dict() for t in reversed(self._slow)]
+
+    def snapshot(self, extra=None):
+        """Everything as one JSON-serializable dict; `extra` (e.g. pool/cache stats) is merged in."""
+        snap = {"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "slow_ms": self.slow_ms,
+                "queries": self.summary(),
+                "slow_queries": self.slow_queries()}
+        snap.update(extra or {})
+        return snap
+
+    def dump(self, path, extra=None):
+        """Write a snapshot to `path`: CSV of the per-statement summary for *.csv, else JSON."""
+        if path.lower().endswith(".csv"):
+            rows = self.summary()
+            fields = list(rows[0]) if rows else ["sql"]
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(extra), f, indent=2, default=str)
@@ -0,0 +1,150 @@
+"""Render every portfolio's dashboard to PNG/PDF files, without Tk.
+
+    python report.py --out reports/ --format png --format pdf
+    python report.py --out reports/ --portfolio 7 --portfolio 12 --from 2025-01-01
+
+Portfolios are spread over a process pool; each worker keeps one MySQL
+connection and one Agg figure for its whole life and only updates the
+figure's artists from one portfolio to the next. The charts are the
+GUI's (charts.DashboardFigure) fed by the same queries
+(dashboard_data), with the price history drawn for each portfolio's
+largest holding unless --ticker is given.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+from db_workers import connection, progress, run_tasks, worker
+
+
+# =========================
+# WORKER SIDE
+# =========================
+
+def _setup_worker(out_dir, formats, ticker, start, end, marker_limit):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    from charts import DashboardFigure
+
+    from snapshots import is_built
+
+    fig = Figure(figsize=(11, 8.5), dpi=100)
+    worker.update(
+        fig=fig, snapshots=is_built(worker["conn"]),
+        dash=DashboardFigure(fig, marker_limit, no_ticker_message="No holdings to chart."),
+        # summary block in the top-left corner, above the charts
+        header=fig.text(0.02, 0.98, "", va="top", family="monospace"),
+        out_dir=out_dir, formats=formats, ticker=ticker, start=start, end=end)
+
+
+def render_portfolio(pid):
+    """Fetch and draw one portfolio; returns (pid, files, rows, fetch_ms, render_ms)."""
+    from dashboard_data import load_dashboard_data, load_price_history, summary_text
+
+    w = worker
+    t0 = time.perf_counter()
+    conn = connection()
+    data = load_dashboard_data(conn, pid, use_snapshots=w["snapshots"])
+    ticker = w["ticker"]
+    if ticker is None and data.holdings:
+        # largest holding by market value
+        mv = data.holdings.array("marketValue", null=0.0)
+        ticker = data.holdings.values("tickerSymbol")[int(mv.argmax())]
+    if ticker:
+        data = data._replace(ticker=ticker,
+                             prices=load_price_history(conn, pid, ticker, w["start"], w["end"]))
+    t1 = time.perf_counter()
+
+    dash, fig = w["dash"], w["fig"]
+    if data.holdings:
+        w["header"].set_text(summary_text(pid, data.summary))
+        dash.show(data)
+    else:
+        w["header"].set_text(f"Portfolio {pid}\nNo holdings for this portfolio.")
+        dash.clear()
+    # every portfolio has its own tick labels, so reports are always laid out
+    fig.tight_layout(rect=(0, 0, 1, 0.86))
+    files = []
+    for fmt in w["formats"]:
+        path = os.path.join(w["out_dir"], f"portfolio_{pid}.{fmt}")
+        fig.savefig(path, format=fmt)
+        files.append(path)
+    rows = len(data.holdings) + len(data.prices[0])
+    return pid, files, rows, (t1 - t0) * 1000, (time.perf_counter() - t1) * 1000
+
+
+# =========================
+# DRIVER
+# =========================
+
+def run_reports(db_config, pids, out_dir, formats=("png",), workers=None, ticker=None,
+                start=None, end=None, marker_limit=200):
+    """Render reports for `pids`; returns a dict summarizing the run."""
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.perf_counter()
+    done, files, rows, fetch_ms, render_ms, errors = 0, 0, 0, 0.0, 0.0, []
+    setup_args = (out_dir, tuple(formats), ticker, start, end, marker_limit)
+    for (pid,), fut in run_tasks(render_portfolio, [(pid,) for pid in pids], db_config,
+                                 workers, _setup_worker, setup_args):
+        done += 1
+        try:
+            _, written, n, f_ms, r_ms = fut.result()
+            files += len(written)
+            rows += n
+            fetch_ms += f_ms
+            render_ms += r_ms
+        except Exception as e:
+            errors.append((pid, f"{type(e).__name__}: {e}"))
+        progress(done, len(pids), done, "portfolios", started, f", {len(errors)} errors")
+
+    elapsed = time.perf_counter() - started
+    ok = done - len(errors)
+    return {"portfolios": len(pids), "ok": ok, "errors": errors, "files": files, "rows": rows,
+            "elapsed_s": elapsed,
+            "per_second": ok / elapsed if elapsed > 0 else 0.0,
+            "avg_fetch_ms": fetch_ms / ok if ok else None,
+            "avg_render_ms": render_ms / ok if ok else None}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--out", default="reports", help="output directory (default: reports)")
+    ap.add_argument("--format", action="append", choices=("png", "pdf"),
+                    help="file format, repeatable (default: png)")
+    ap.add_argument("--portfolio", action="append", type=int,
+                    help="portfolio ID, repeatable (default: every portfolio)")
+    ap.add_argument("--ticker", help="price history ticker (default: each portfolio's largest holding)")
+    ap.add_argument("--from", dest="start", type=date.fromisoformat, help="first price date, YYYY-MM-DD")
+    ap.add_argument("--to", dest="end", type=date.fromisoformat, help="last price date, YYYY-MM-DD")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(),
+                    help="worker processes, each with its own connection (default: CPU count)")
+    args = ap.parse_args(argv)
+
+    # the GUI module holds the connection settings; importing it opens nothing
+    from portfolio_gui import DB_CONFIG, IMPORT_BATCH_SIZE, POOL, PRICE_MARKER_LIMIT, fetch_all
+    from snapshots import update_snapshots
+
+    with POOL.connection() as conn:
+        # the value history charts read the daily snapshots, if they have been
+        # built (python snapshots.py); bring them up to date once
+        update_snapshots(conn, batch_size=IMPORT_BATCH_SIZE)
+    pids = args.portfolio or [r[0] for r in fetch_all(
+        "SELECT portfolioID FROM Portfolio ORDER BY portfolioID")[1]]
+    POOL.close_all()  # workers open their own connections
+    s = run_reports(DB_CONFIG, pids, args.out, args.format or ["png"], args.workers,
+                    args.ticker, args.start, args.end, PRICE_MARKER_LIMIT)
+
+    print(f"{s['ok']}/{s['portfolios']} portfolios, {s['files']} files, {s['rows']:,} rows "
+          f"in {s['elapsed_s']:.1f}s ({s['per_second']:.1f} portfolios/s)")
+    if s["ok"]:
+        print(f"avg per portfolio: fetch {s['avg_fetch_ms']:.0f} ms, render {s['avg_render_ms']:.0f} ms")
+    for pid, err in s["errors"][:20]:
+        print(f"portfolio {pid}: {err}")
+    return 1 if s["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+
+# =========================
+# REQUEST COORDINATOR
+# =========================
+
+class _Flight:
+    """One job on the executor and the slots waiting for its result."""
+
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        self.waiting = {}     # slot -> (on_done, on_error)
+        self.thread = None    # ident of the worker thread while the job runs
+        self.started = None   # time.monotonic() when it started running
+        self.killed = False
+
+
+class RequestCoordinator:
+    """Single-flight front of a TkExecutor for requests that each feed one widget.
+
+    submit(slot, key, fn, *args) runs fn(*args) on behalf of `slot`, e.g.
+    "dashboard". A request whose key matches one already in flight joins
+    it instead of running again, so a double click costs one set of
+    queries; key None never joins. A slot only waits for its latest
+    request: submitting again supersedes the previous one, whose result
+    (or error) is dropped, so only the newest result is rendered.
+
+    A superseded job that no slot waits for any more is cancelled if it
+    has not started. Once it has run for `kill_after` seconds, the
+    statement its worker is running is stopped with KILL QUERY, sent on a
+    control connection of its own so it gets through even when the pool
+    is exhausted. The job then fails with "Query execution was
+    interrupted", which nobody sees.
+    """
+
+    def __init__(self, jobs, pool, kill_after=0.5):
+        self.jobs = jobs
+        self.pool = pool
+        self.kill_after = kill_after
+        self._lock = threading.Lock()   # guards _Flight.thread / started across threads
+        self._flights = {}              # key -> _Flight a new request may join
+        self._slots = {}                # slot -> _Flight it waits for
+        self._killer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kill")
+        self._control = None            # used on the killer thread only
+        self._stats = {"submitted": 0, "coalesced": 0, "superseded": 0,
+                       "cancelled": 0, "killed": 0, "kill_errors": 0}
+
+    # ---------- public API (Tk thread) ----------
+    def submit(self, slot, key, fn, *args, on_done=None, on_error=None, tab=None):
+        """Run fn(*args) for `slot` under executor tab `tab` (default: slot), or join `key`'s run."""
+        flight = self._flights.get(key) if key is not None else None
+        if self._slots.get(slot) is not flight:
+            self._leave(slot)
+        if flight is None:
+            flight = _Flight(key)
+            if key is not None:
+                self._flights[key] = flight
+            self._stats["submitted"] += 1
+            flight.future = self.jobs.submit(tab or slot, self._run, flight, fn, args,
+                                             on_done=lambda r: self._done(flight, r),
+                                             on_error=lambda e: self._failed(flight, e))
+        else:
+            self._stats["coalesced"] += 1
+        flight.waiting[slot] = (on_done, on_error)
+        self._slots[slot] = flight
+        return flight.future
+
+    def supersede(self, slot):
+        """Stop waiting for `slot`'s request, e.g. because its widget was cleared."""
+        self._leave(slot)
+
+    def stats(self):
+        s = dict(self._stats)
+        s["in_flight"] = len({id(f) for f in self._slots.values()})
+        return s
+
+    def shutdown(self):
+        self._killer.submit(self._close_control)
+        self._killer.shutdown(wait=False)
+
+    # ---------- Tk-thread side ----------
+    def _leave(self, slot):
+        flight = self._slots.pop(slot, None)
+        if flight is None:
+            return
+        del flight.waiting[slot]
+        self._stats["superseded"] += 1
+        if flight.waiting:
+            return
+        if flight.future.cancel():
+            self._stats["cancelled"] += 1
+            self._forget(flight)
+        else:
+            self._watch(flight)
+
+    def _watch(self, flight):
+        """Kill an abandoned flight's statement once it has been running kill_after seconds."""
+        if flight.waiting or flight.killed or flight.future.done():
+            return  # joined again, or over
+        with self._lock:
+            started = flight.started
+        wait = self.kill_after if started is None else started + self.kill_after - time.monotonic()
+        if wait > 0:
+            self.jobs.root.after(int(wait * 1000) + 1, self._watch, flight)
+            return
+        flight.killed = True
+        self._forget(flight)  # a new request for the key must not join a dying job
+        self._stats["killed"] += 1
+        self._killer.submit(self._kill_queries, flight)
+
+    def _forget(self, flight):
+        if flight.key is not None and self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    def _finish(self, flight):
+        self._forget(flight)
+        waiting, flight.waiting = flight.waiting, {}
+        for slot in waiting:
+            del self._slots[slot]
+        return waiting.values()
+
+    def _done(self, flight, result):
+        for on_done, _ in self._finish(flight):
+            if on_done:
+                on_done(result)
+
+    def _failed(self, flight, error):
+        # nobody waiting: the job was superseded (and most likely killed)
+        unhandled = False
+        for _, on_error in self._finish(flight):
+            if on_error:
+                on_error(error)
+            else:
+                unhandled = True
+        if unhandled:
+            raise error  # shown on the tab's status label
+
+    # ---------- worker side ----------
+    def _run(self, flight, fn, args):
+        with self._lock:
+            flight.thread = threading.get_ident()
+            flight.started = time.monotonic()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                flight.thread = None
+
+    def _kill_queries(self, flight):
+        # connect (or ping) first: looking the connections up and then
+        # spending a connect and login before the KILL would leave them time
+        # to be released and handed to another job
+        try:
+            control = self._control_connection()
+        except mysql.connector.Error:
+            self._stats["kill_errors"] += 1
+            return
+        with self._lock:
+            thread = flight.thread
+            if thread is None:
+                return  # finished meanwhile
+            # server thread ids of the connections the flight's worker holds
+            targets = [c.connection_id for c in self.pool.held_by(thread)]
+        for target in targets:
+            with self._lock:
+                # only while the flight still runs and its worker still holds
+                # that server connection; what is left is the round trip of
+                # the KILL itself on an open connection
+                if flight.thread != thread or not any(
+                        c.connection_id == target for c in self.pool.held_by(thread)):
+                    continue
+            try:
+                cur = control.cursor()
+                try:
+                    cur.execute(f"KILL QUERY {int(target)}")
+                finally:
+                    cur.close()
+            except mysql.connector.Error as e:
+                if getattr(e, "errno", None) != 1094:  # unknown thread: already gone
+                    self._stats["kill_errors"] += 1
+                    self._close_control()
+                    return
+
+    def _control_connection(self):
+        """The open control connection, reconnected if the server dropped it."""
+        if self._control is not None:
+            try:
+                self._control.ping(reconnect=False)
+            except mysql.connector.Error:
+                self._close_control()
+        if self._control is None:
+            self._control = mysql.connector.connect(**self.pool.config)
+            self._control.autocommit = True
+        return self._control
+
+    def _close_control(self):
+        if self._control is not None:
+            try:
+                self._control.close()
+            except mysql.connector.Error:
+                pass
+            self._control = None
@@ -0,0 +1,298 @@
+"""Actual vs. ideal risk allocation and drift, for one user or every user.
+
+    python risk_engine.py --out drift.csv
+    python risk_engine.py --table RiskDrift --users-per-chunk 5000 --workers 4
+
+The numbers come from the GetRiskAnalysis(userID) procedure, the same
+source as the GUI's Risk Analysis tab and the web app's /api/risk route:
+it is called once per user, a few hundred CALLs to a round trip, and the
+rows are collected into columns and grouped by (user, category) with
+NumPy. Ranges of user IDs are spread over a process pool, each worker
+with its own connection. The Risk Analysis tab runs the same allocate()
+on a single user.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+
+from columnar import ColumnarResult
+from db_workers import connection, progress, run_tasks
+
+
+# =========================
+# RISK QUERIES
+# =========================
+
+RISK_PROCEDURE = "GetRiskAnalysis"  # GetRiskAnalysis(IN p_userID INT)
+CALLS_PER_TRIP = 200  # CALLs sent together as one multi-statement batch
+
+# GetRiskAnalysis returns actualPct / idealPct per risk category, or per
+# holding in the web app's version; rows are grouped by the first of these
+# columns the result has, other columns are ignored
+GROUP_COLUMNS = ("modelRiskCategory", "tickerSymbol")
+PCT_COLUMNS = ("actualPct", "idealPct")
+
+USER_RANGE_SQL = "SELECT MIN(userID), MAX(userID) FROM UserProfile"
+USERS_SQL = "SELECT userID FROM UserProfile WHERE userID BETWEEN %s AND %s ORDER BY userID"
+
+UNKNOWN = "Unknown"  # rows without a category
+
+# users: int64 (n,) sorted; by: the GROUP_COLUMNS column grouped by;
+# categories: list of k names; actual, ideal, drift: float64 (n, k)
+# actualPct and idealPct summed per category, and actual - ideal
+RiskResult = namedtuple("RiskResult", "users by categories actual ideal drift")
+
+# "category" holds the modelRiskCategory or tickerSymbol grouped by
+DRIFT_COLUMNS = ["userID", "category", "actualPct", "idealPct", "driftPct"]
+
+
+# =========================
+# VECTORIZED AGGREGATION
+# =========================
+
+def collect(results):
+    """ColumnarResult of GetRiskAnalysis rows from (userID, columns, rows) per call.
+
+    The result has a userID column in front of the procedure's own; calls
+    that returned no result set (columns None) add nothing.
+    """
+    out = None
+    for uid, cols, rows in results:
+        if cols is None:
+            continue
+        if out is None:
+            types = ["str" if c in GROUP_COLUMNS else "float" if c in PCT_COLUMNS else None
+                     for c in cols]
+            out = ColumnarResult(["userID"] + list(cols), ["int"] + types)
+        out.extend([(uid,) + tuple(r) for r in rows])
+    return out if out is not None else ColumnarResult(["userID"], ["int"])
+
+
+def allocate(risk):
+    """RiskResult from collect()'s rows; None when the result lacks the columns it needs.
+
+    actualPct and idealPct are summed per (user, category), so a procedure
+    returning a row per holding gives the same allocation by ticker that
+    the web app charts. NULLs count as 0. Users without rows are left out.
+    """
+    by = next((c for c in GROUP_COLUMNS if c in risk.cols), None)
+    if by is None or not all(c in risk.cols for c in PCT_COLUMNS):
+        return None
+    # category -> column, in first-seen order; NULL and "" fold into UNKNOWN
+    columns = {}
+    remap = np.array([columns.setdefault(c or UNKNOWN, len(columns)) for c in risk.labels(by)],
+                     dtype=np.int64)
+    ci = remap[risk.array(by)] if len(remap) else np.zeros(0, dtype=np.int64)
+
+    users, ui = np.unique(risk.array("userID"), return_inverse=True)
+    k = len(columns)
+    # group-by (user, category) as one weighted bincount over a flattened index
+    flat = ui * k + ci
+    actual, ideal = (np.bincount(flat, weights=risk.array(c, null=0.0), minlength=len(users) * k)
+                     .astype(np.float64, copy=False).reshape(len(users), k)
+                     for c in PCT_COLUMNS)
+    return RiskResult(users, by, list(columns), actual, ideal, actual - ideal)
+
+
+def rebalance_pct(result):
+    """Per user, the share of the portfolio (in actualPct's units) that would have to move."""
+    return np.abs(result.drift).sum(axis=1) / 2
+
+
+def _shown(result, i):
+    # categories the user holds or the model wants some of
+    return np.flatnonzero((result.actual[i] != 0) | (result.ideal[i] != 0))
+
+
+def user_allocation(result, i):
+    """(categories, actual %, ideal %) of the i-th user, as the risk pies show them."""
+    idx = _shown(result, i)
+    return ([result.categories[j] for j in idx],
+            result.actual[i, idx].tolist(), result.ideal[i, idx].tolist())
+
+
+def user_table(result, i):
+    """(columns, rows) of the i-th user's allocation, one row per category."""
+    rows = [(result.categories[j], round(float(result.actual[i, j]), 4),
+             round(float(result.ideal[i, j]), 4), round(float(result.drift[i, j]), 4))
+            for j in _shown(result, i)]
+    return [result.by] + DRIFT_COLUMNS[2:], rows
+
+
+def drift_rows(result):
+    """(userID, category, actualPct, idealPct, driftPct) per user and shown category."""
+    for i, uid in enumerate(result.users.tolist()):
+        for row in user_table(result, i)[1]:
+            yield (uid,) + row
+
+
+# =========================
+# WORKER SIDE
+# =========================
+
+def _fetch(conn, sql, params=()):
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params)
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def _call_users(conn, uids):
+    """(userID, columns, rows) of GetRiskAnalysis per user, CALLS_PER_TRIP calls per round trip."""
+    from dashboard_data import call_batch
+
+    for i in range(0, len(uids), CALLS_PER_TRIP):
+        part = uids[i:i + CALLS_PER_TRIP]
+        for uid, (cols, rows) in zip(part, call_batch(conn, RISK_PROCEDURE, [(u,) for u in part])):
+            yield uid, cols, rows
+
+
+def run_chunk(lo, hi):
+    """Allocation of users lo..hi; returns (RiskResult, procedure rows read, fetch_ms, compute_ms)."""
+    t0 = time.perf_counter()
+    conn = connection()
+    uids = [r[0] for r in _fetch(conn, USERS_SQL, (lo, hi))]
+    risk = collect(_call_users(conn, uids))
+    t1 = time.perf_counter()
+    result = allocate(risk)
+    if result is None:
+        if not len(risk):
+            result = RiskResult(np.zeros(0, dtype=np.int64), None, [], *[np.zeros((0, 0))] * 3)
+        else:
+            raise ValueError(f"{RISK_PROCEDURE} returned {risk.cols[1:]}, which lack "
+                             f"{' or '.join(GROUP_COLUMNS)} or {' / '.join(PCT_COLUMNS)}")
+    return result, len(risk), (t1 - t0) * 1000, (time.perf_counter() - t1) * 1000
+
+
+# =========================
+# DRIVER
+# =========================
+
+def user_ranges(lo, hi, per_chunk):
+    return [(a, min(a + per_chunk - 1, hi)) for a in range(lo, hi + 1, per_chunk)]
+
+
+class TableWriter:
+    """Writes drift rows for one run date to `table`, replacing that date's earlier rows."""
+
+    def __init__(self, conn, table, run_date, batch_size=1000):
+        self.conn = conn
+        self.table = table
+        self.run_date = run_date
+        self.batch_size = batch_size
+        cur = conn.cursor()
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "runDate DATE NOT NULL, userID INT NOT NULL, "
+                    "category VARCHAR(50) NOT NULL, "
+                    "actualPct DECIMAL(9, 4), idealPct DECIMAL(9, 4), driftPct DECIMAL(9, 4), "
+                    "PRIMARY KEY (runDate, userID, category))")
+        cur.execute(f"DELETE FROM {table} WHERE runDate = %s", (run_date,))
+        conn.commit()
+        cur.close()
+
+    def write(self, rows):
+        sql = (f"INSERT INTO {self.table} (runDate, " + ", ".join(DRIFT_COLUMNS) + ") "
+               "VALUES (" + ", ".join(["%s"] * (len(DRIFT_COLUMNS) + 1)) + ")")
+        rows = [(self.run_date,) + r for r in rows]
+        cur = self.conn.cursor()
+        try:
+            for i in range(0, len(rows), self.batch_size):
+                cur.executemany(sql, rows[i:i + self.batch_size])
+                self.conn.commit()
+        finally:
+            cur.close()
+
+
+def run_batch(db_config, ranges, sinks, workers=None, top=20):
+    """Allocate every user in `ranges`, passing each chunk's drift rows to each sink.
+
+    A sink is a callable taking a list of drift rows. Returns a dict
+    summarizing the run, with the `top` users furthest from the model.
+    """
+    started = time.perf_counter()
+    users = read = 0
+    fetch_ms = compute_ms = 0.0
+    worst = []  # (rebalance %, userID)
+    for done, (_, fut) in enumerate(run_tasks(run_chunk, ranges, db_config, workers), 1):
+        result, n, f_ms, c_ms = fut.result()
+        users += len(result.users)
+        read += n
+        fetch_ms += f_ms
+        compute_ms += c_ms
+        rows = list(drift_rows(result))
+        for sink in sinks:
+            sink(rows)
+        if len(result.users):
+            r = rebalance_pct(result)
+            best = np.argsort(-r)[:top]
+            worst = sorted(worst + list(zip(r[best].tolist(), result.users[best].tolist())),
+                           reverse=True)[:top]
+        progress(done, len(ranges), users, "users", started)
+
+    elapsed = time.perf_counter() - started
+    return {"users": users, "rows": read, "chunks": len(ranges), "elapsed_s": elapsed,
+            "per_second": users / elapsed if elapsed > 0 else 0.0,
+            "fetch_ms": fetch_ms, "compute_ms": compute_ms, "worst": worst}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--out", help="write drift rows to this CSV file")
+    ap.add_argument("--table", help="write drift rows to this table (created if missing), "
+                                    "replacing the run date's earlier rows")
+    ap.add_argument("--date", type=date.fromisoformat, default=date.today(),
+                    help="run date stored with --table rows (default: today)")
+    ap.add_argument("--users-per-chunk", type=int, default=5000,
+                    help="user IDs per worker task (default: 5000)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(),
+                    help="worker processes, each with its own connection (default: CPU count)")
+    ap.add_argument("--top", type=int, default=20, help="list this many users furthest from the model")
+    args = ap.parse_args(argv)
+    if not (args.out or args.table):
+        ap.error("give --out and/or --table")
+
+    from portfolio_gui import DB_CONFIG, IMPORT_BATCH_SIZE, POOL, fetch_all
+
+    lo, hi = fetch_all(USER_RANGE_SQL)[1][0]
+    ranges = user_ranges(lo, hi, args.users_per_chunk) if lo is not None else []
+    POOL.close_all()  # workers open their own connections
+
+    sinks = []
+    out = conn = None
+    try:
+        if args.out:
+            out = open(args.out, "w", newline="", encoding="utf-8")
+            writer = csv.writer(out)
+            writer.writerow(DRIFT_COLUMNS)
+            sinks.append(writer.writerows)
+        if args.table:
+            import mysql.connector
+            conn = mysql.connector.connect(**DB_CONFIG)
+            sinks.append(TableWriter(conn, args.table, args.date, IMPORT_BATCH_SIZE).write)
+        s = run_batch(DB_CONFIG, ranges, sinks, args.workers, args.top)
+    finally:
+        if out is not None:
+            out.close()
+        if conn is not None:
+            conn.close()
+
+    print(f"{s['users']:,} users, {s['rows']:,} {RISK_PROCEDURE} rows in {s['chunks']} chunks "
+          f"in {s['elapsed_s']:.1f}s ({s['per_second']:,.0f} users/s; "
+          f"fetch {s['fetch_ms'] / 1000:.1f}s, compute {s['compute_ms'] / 1000:.1f}s across workers)")
+    if s["worst"]:
+        print("furthest from the model (% of the portfolio to rebalance):")
+        for pct, uid in s["worst"]:
+            print(f"  user {uid}: {pct:.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
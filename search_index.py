@@ -0,0 +1,202 @@
+import time
+from bisect import bisect_left, insort
+from itertools import islice
+
+
+# =========================
+# SEARCH INDEX
+# =========================
+
+class SearchIndex:
+    """In-memory type-ahead index over table rows, answering searches without a DB round trip.
+
+    Rows are the query's whole rows; only the `fields` columns are
+    searched, as lowercased whitespace-separated tokens. A search is one
+    or more terms that must all match: a term of one or two characters
+    matches the start of a token ("ma" finds "Mary"), a longer one
+    matches anywhere in a token ("ary" finds "Mary", "123" finds user
+    41234).
+
+    Each token is indexed under its first one and two characters and
+    under every three-character substring (trigrams). A search walks the
+    shortest posting list among its terms' grams and checks the other
+    terms against each row's tokens, so its cost depends on the rows it
+    returns, not on the size of the table. Posting lists are kept in key
+    order, so results come back ordered by `key` and the walk stops after
+    `limit` matches.
+    """
+
+    def __init__(self, cols, key, fields, rows=()):
+        self.cols = list(cols)
+        self._key = self.cols.index(key)
+        self._fields = [self.cols.index(f) for f in fields]
+        self.rows = {}    # key -> row
+        self._text = {}   # key -> "\0token\0token..." for checking terms
+        self._grams = {}  # gram -> keys in ascending order
+        for row in rows:
+            row = tuple(row)
+            self.rows[row[self._key]] = row
+        # in key order, appending keeps every posting list sorted
+        for key in sorted(self.rows):
+            text = self._text[key] = self._tokens(self.rows[key])
+            for g in self._token_grams(text):
+                self._grams.setdefault(g, []).append(key)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def last_key(self):
+        """Highest key indexed, or None when empty."""
+        return max(self.rows) if self.rows else None
+
+    # ---------- maintenance ----------
+    def add(self, row):
+        """Index `row`, replacing the row with the same key if there is one."""
+        row = tuple(row)
+        key = row[self._key]
+        if key in self.rows:
+            self.remove(key)
+        text = self._text[key] = self._tokens(row)
+        self.rows[key] = row
+        for g in self._token_grams(text):
+            keys = self._grams.get(g)
+            if keys is None:
+                self._grams[g] = [key]
+            elif keys[-1] < key:
+                keys.append(key)
+            else:
+                insort(keys, key)
+
+    def remove(self, key):
+        """Drop the row with `key`; returns False if it was not indexed."""
+        if key not in self.rows:
+            return False
+        del self.rows[key]
+        for g in self._token_grams(self._text.pop(key)):
+            keys = self._grams[g]
+            del keys[bisect_left(keys, key)]
+            if not keys:
+                del self._grams[g]
+        return True
+
+    def _tokens(self, row):
+        return "".join("\0" + tok for i in self._fields if row[i] is not None
+                       for tok in str(row[i]).lower().split())
+
+    @staticmethod
+    def _token_grams(text):
+        grams = set()
+        for tok in text.split("\0")[1:]:
+            padded = "\0" + tok
+            grams.add(padded[:2])
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return grams
+
+    # ---------- lookups ----------
+    def search(self, text, limit=200):
+        """Rows matching every term of `text`, in key order, at most `limit` of them."""
+        terms = text.lower().split()
+        if not terms:
+            return []
+        needles = []
+        shortest = None
+        for t in terms:
+            if len(t) < 3:
+                needle = "\0" + t
+                grams = (needle,)
+            else:
+                needle = t
+                grams = {t[i:i + 3] for i in range(len(t) - 2)}
+            needles.append(needle)
+            for g in grams:
+                keys = self._grams.get(g)
+                if keys is None:
+                    return []
+                if shortest is None or len(keys) < len(shortest):
+                    shortest = keys
+        texts = self._text
+        if len(needles) == 1:
+            needle = needles[0]
+            keys = filter(lambda k: needle in texts[k], shortest)
+        else:
+            keys = filter(lambda k: all(n in texts[k] for n in needles), shortest)
+        return [self.rows[k] for k in islice(keys, limit)]
+
+
+# =========================
+# TYPE-AHEAD FILTER
+# =========================
+
+class TypeAheadFilter:
+    """Filters a PagedTable through a SearchIndex on every keystroke in an Entry.
+
+    load(last_key, size) runs on the executor and returns a new
+    SearchIndex when called with last_key None, or when the table no
+    longer has `size` rows up to `last_key` (rows were deleted
+    elsewhere); otherwise the list of rows added past `last_key`.
+    refresh() tops the index up that way; remove() drops a row the app
+    deleted itself. While the Entry is empty the table pages as usual;
+    otherwise it shows the first `limit` matches. on_status(text)
+    reports how many rows matched and how long the search took.
+    """
+
+    def __init__(self, entry, table, load, limit=200, on_status=None):
+        self.entry = entry
+        self.table = table
+        self.load = load
+        self.limit = limit
+        self.on_status = on_status or (lambda text: None)
+        self.index = None
+        self.active = False   # the table shows search results
+        self._loading = False
+        entry.bind("<KeyRelease>", lambda e: self.apply())
+
+    def refresh(self):
+        """Top the index up with rows added since it was built, and reload what is shown."""
+        if not self._loading:
+            self._loading = True
+            last = self.index.last_key if self.index is not None else None
+            size = len(self.index) if self.index is not None else 0
+            self.table.jobs.submit(self.table.tab + ".index", self.load, last, size,
+                                   on_done=self._on_loaded, on_error=self._on_error)
+        if not self.active:
+            self.table.reload()
+
+    def remove(self, key):
+        if self.index is not None and self.index.remove(key):
+            self.apply()
+
+    def apply(self):
+        """Show the rows matching the Entry's text, or go back to paging if it is empty."""
+        text = self.entry.get()
+        if not text.strip():
+            if self.active:
+                self.active = False
+                self.on_status("")
+                self.table.reload()
+            return
+        self.active = True
+        if self.index is None:
+            self.on_status("Indexing...")
+            return
+        t0 = time.perf_counter()
+        rows = self.index.search(text, self.limit)
+        ms = (time.perf_counter() - t0) * 1000
+        self.table.show(self.index.cols, rows)
+        found = f"first {len(rows)}" if len(rows) == self.limit else str(len(rows))
+        self.on_status(f"{found} of {len(self.index):,} match ({ms:.2f} ms)")
+
+    def _on_loaded(self, result):
+        self._loading = False
+        if isinstance(result, SearchIndex):
+            self.index = result
+        else:
+            for r in result:
+                self.index.add(r)
+        if self.active:
+            self.apply()
+
+    def _on_error(self, error):
+        self._loading = False
+        self.on_status(f"Search index: {error}")
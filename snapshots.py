@@ -0,0 +1,344 @@
+"""Daily portfolio value snapshots, maintained incrementally from TransactionRecord.
+
+    python snapshots.py            # install and build the snapshots, or catch up with changes
+    python snapshots.py --rebuild  # drop and reinstall the snapshot tables, replay every trade
+
+For every portfolio, PortfolioPositionDaily holds each ticker's end-of-day
+quantity, last traded price and book cost on the days it traded, and
+PortfolioValueDaily the portfolio's end-of-day market value and book cost
+on the days any of its tickers traded. Prices only change on trades, so
+values are steps between those days. Book cost follows the web app's
+rules: a buy adds price x quantity, a sell (a trade with a sale price, or
+a negative quantity) reduces it in proportion to the shares sold.
+
+Triggers on TransactionRecord log the portfolio and date of every
+inserted, updated or deleted trade to SnapshotChange. An update replays,
+per portfolio in the log, the trades from the earliest logged date on,
+starting from the positions stored for the day before, then deletes the
+log rows it read; rows committed meanwhile wait for the next update.
+transactionIDs are entered by users, so they are no watermark. Trades
+removed by a cascading Portfolio delete fire no triggers, but the
+portfolio's snapshot rows cascade with it.
+
+Creating the tables and triggers needs CREATE / TRIGGER privileges, so it
+is only done here, by an administrator. Until the snapshots are built,
+the GUI and report.py show no value history. The dashboard reads a built
+series with one primary-key range scan, however many trades are behind
+it.
+"""
+import argparse
+import sys
+import time
+from datetime import date, datetime
+
+
+# =========================
+# SNAPSHOT TABLES
+# =========================
+
+SNAPSHOT = "portfolio_value"  # SnapshotState key
+
+TABLES = ("SnapshotState", "SnapshotChange", "PortfolioPositionDaily", "PortfolioValueDaily")
+
+SCHEMA = (
+    # builtAt stays NULL until the first build has finished
+    "CREATE TABLE IF NOT EXISTS SnapshotState ("
+    "snapshot VARCHAR(50) PRIMARY KEY, builtAt DATETIME)",
+    "CREATE TABLE IF NOT EXISTS SnapshotChange ("
+    "changeID BIGINT AUTO_INCREMENT PRIMARY KEY, portfolioID INT, transactionDate DATE)",
+    "CREATE TABLE IF NOT EXISTS PortfolioPositionDaily ("
+    "portfolioID INT NOT NULL, tickerSymbol VARCHAR(10) NOT NULL, valueDate DATE NOT NULL, "
+    "quantity DECIMAL(18, 4) NOT NULL, price DECIMAL(18, 4), bookCost DECIMAL(18, 2) NOT NULL, "
+    "PRIMARY KEY (portfolioID, tickerSymbol, valueDate), "
+    "FOREIGN KEY (portfolioID) REFERENCES Portfolio (portfolioID) ON DELETE CASCADE)",
+    "CREATE TABLE IF NOT EXISTS PortfolioValueDaily ("
+    "portfolioID INT NOT NULL, valueDate DATE NOT NULL, marketValue DECIMAL(18, 2) NOT NULL, "
+    "bookCost DECIMAL(18, 2) NOT NULL, positions INT NOT NULL, "
+    "PRIMARY KEY (portfolioID, valueDate), "
+    "FOREIGN KEY (portfolioID) REFERENCES Portfolio (portfolioID) ON DELETE CASCADE)",
+)
+
+# trigger name -> (event, rows logged to SnapshotChange)
+TRIGGERS = {
+    "snapshot_trade_insert": ("INSERT", "(NEW.portfolioID, NEW.transactionDate)"),
+    "snapshot_trade_update": ("UPDATE", "(OLD.portfolioID, OLD.transactionDate), "
+                                        "(NEW.portfolioID, NEW.transactionDate)"),
+    "snapshot_trade_delete": ("DELETE", "(OLD.portfolioID, OLD.transactionDate)"),
+}
+
+FIRST_DAY = date(1000, 1, 1)  # MySQL's earliest DATE; trades without a date replay from here
+
+# the dashboard's value-over-time series, in dashboard_data.collect_series shape
+VALUE_SERIES_SQL = (
+    "SELECT valueDate, marketValue FROM PortfolioValueDaily "
+    "WHERE portfolioID = %s ORDER BY valueDate"
+)
+
+TRADE_COLUMNS = ("portfolioID, tickerSymbol, marketPricePerShare, salePricePerShare, "
+                 "quantity, transactionDate")
+
+CHANGES_SQL = "SELECT changeID, portfolioID, transactionDate FROM SnapshotChange ORDER BY changeID"
+
+# first trade date per portfolio, for a build
+FIRST_TRADES_SQL = "SELECT portfolioID, MIN(transactionDate) FROM TransactionRecord GROUP BY portfolioID"
+
+# each ticker's last stored position before a date
+POSITIONS_BEFORE_SQL = (
+    "SELECT s.tickerSymbol, s.quantity, s.price, s.bookCost FROM PortfolioPositionDaily s "
+    "JOIN (SELECT tickerSymbol, MAX(valueDate) AS lastDate FROM PortfolioPositionDaily "
+    "      WHERE portfolioID = %s AND valueDate < %s GROUP BY tickerSymbol) l "
+    "  ON l.tickerSymbol = s.tickerSymbol AND l.lastDate = s.valueDate "
+    "WHERE s.portfolioID = %s"
+)
+
+REPLAY_SQL = (
+    f"SELECT {TRADE_COLUMNS} FROM TransactionRecord "
+    "WHERE portfolioID = %s AND transactionDate >= %s "
+    "ORDER BY transactionDate, transactionID"
+)
+
+POSITION_INSERT_SQL = (
+    "INSERT INTO PortfolioPositionDaily "
+    "(portfolioID, tickerSymbol, valueDate, quantity, price, bookCost) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+
+VALUE_INSERT_SQL = (
+    "INSERT INTO PortfolioValueDaily (portfolioID, valueDate, marketValue, bookCost, positions) "
+    "VALUES (%s, %s, %s, %s, %s)"
+)
+
+
+def install(conn, reinstall=False):
+    """Create the snapshot tables and the change-log triggers (admin only; see main()).
+
+    reinstall=True drops the tables first, so the snapshots must be built
+    again.
+    """
+    cur = conn.cursor()
+    try:
+        if reinstall:
+            for name in reversed(TABLES):
+                cur.execute(f"DROP TABLE IF EXISTS {name}")
+        for statement in SCHEMA:
+            cur.execute(statement)
+        for name, (event, rows) in TRIGGERS.items():
+            cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cur.execute(f"CREATE TRIGGER {name} AFTER {event} ON TransactionRecord FOR EACH ROW "
+                        f"INSERT INTO SnapshotChange (portfolioID, transactionDate) VALUES {rows}")
+        cur.execute("INSERT IGNORE INTO SnapshotState (snapshot, builtAt) VALUES (%s, NULL)",
+                    (SNAPSHOT,))
+        conn.commit()
+    finally:
+        cur.close()
+
+
+def is_built(conn):
+    """True once the snapshots have been installed and built; never creates anything."""
+    import mysql.connector
+
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT builtAt FROM SnapshotState WHERE snapshot = %s", (SNAPSHOT,))
+        rows = cur.fetchall()
+    except mysql.connector.Error as e:
+        # no such table: not installed; unknown column: an older layout, reinstall
+        if getattr(e, "errno", None) in (1146, 1054):
+            return False
+        raise
+    finally:
+        cur.close()
+    return bool(rows) and rows[0][0] is not None
+
+
+# =========================
+# REPLAY
+# =========================
+
+class _Replay:
+    """Running positions of one portfolio, turned into end-of-day snapshot rows.
+
+    `positions` maps ticker -> [quantity, price, book cost] as of the end
+    of the day before the first trade fed in.
+    """
+
+    def __init__(self, pid, positions=None):
+        self.pid = pid
+        self.positions = positions or {}
+        self.value = sum(q * (p or 0) for q, p, _ in self.positions.values())
+        self.book = sum(b for _, _, b in self.positions.values())
+        self.day = None
+        self.changed = set()
+        self.position_rows = []
+        self.value_rows = []
+
+    def trade(self, ticker, price, sale_price, qty, day):
+        if day != self.day:
+            self.close_day()
+            self.day = day
+        price, qty = float(price or 0), float(qty or 0)
+        pos = self.positions.setdefault(ticker, [0.0, None, 0.0])
+        old_q, old_p, old_b = pos
+        if sale_price is not None or qty < 0:
+            new_q = old_q - abs(qty)
+            new_b = old_b * new_q / old_q if old_q > 0 and new_q > 0 else 0.0
+        else:
+            new_q = old_q + qty
+            new_b = old_b + price * qty
+        pos[:] = new_q, price, new_b
+        self.value += new_q * price - old_q * (old_p or 0)
+        self.book += new_b - old_b
+        self.changed.add(ticker)
+
+    def close_day(self):
+        if self.day is None:
+            return
+        for t in self.changed:
+            q, p, b = self.positions[t]
+            self.position_rows.append((self.pid, t, self.day, round(q, 4), p, round(b, 2)))
+        held = sum(1 for q, _, _ in self.positions.values() if q)
+        self.value_rows.append((self.pid, self.day, round(self.value, 2), round(self.book, 2), held))
+        self.changed = set()
+
+
+def _write(cur, replay, batch_size):
+    for sql, rows in ((POSITION_INSERT_SQL, replay.position_rows),
+                      (VALUE_INSERT_SQL, replay.value_rows)):
+        for i in range(0, len(rows), batch_size):
+            cur.executemany(sql, rows[i:i + batch_size])
+    replay.position_rows, replay.value_rows = [], []
+
+
+def _replay_from(cur, pid, since, batch_size):
+    """Recompute portfolio `pid`'s snapshots from date `since` on."""
+    cur.execute(POSITIONS_BEFORE_SQL, (pid, since, pid))
+    positions = {t: [float(q), None if p is None else float(p), float(b)]
+                 for t, q, p, b in cur.fetchall()}
+    cur.execute("DELETE FROM PortfolioPositionDaily WHERE portfolioID = %s AND valueDate >= %s",
+                (pid, since))
+    cur.execute("DELETE FROM PortfolioValueDaily WHERE portfolioID = %s AND valueDate >= %s",
+                (pid, since))
+    cur.execute(REPLAY_SQL, (pid, since))
+    replay = _Replay(pid, positions)
+    for _, ticker, price, sale, qty, day in cur.fetchall():
+        replay.trade(ticker, price, sale, qty, day)
+    replay.close_day()
+    _write(cur, replay, batch_size)
+
+
+# =========================
+# UPDATE
+# =========================
+
+def _lock_state(cur):
+    """builtAt of the SnapshotState row, locked so concurrent updaters take turns."""
+    cur.execute("SELECT builtAt FROM SnapshotState WHERE snapshot = %s FOR UPDATE", (SNAPSHOT,))
+    rows = cur.fetchall()
+    return rows[0][0] if rows else None
+
+
+def _read_changes(cur):
+    """(changeIDs, {portfolioID: earliest date}) of the change-log rows visible now."""
+    cur.execute(CHANGES_SQL)
+    ids, changed = [], {}
+    for change_id, pid, day in cur.fetchall():
+        ids.append(change_id)
+        if pid is not None:
+            day = day or FIRST_DAY
+            changed[pid] = min(changed.get(pid, day), day)
+    return ids, changed
+
+
+def _delete_changes(cur, ids, batch_size):
+    # by ID, not by range: a row with a lower ID committed after the read
+    # was not replayed and must stay for the next update
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i:i + batch_size]
+        cur.execute("DELETE FROM SnapshotChange WHERE changeID IN ("
+                    + ", ".join(["%s"] * len(chunk)) + ")", tuple(chunk))
+
+
+def update_snapshots(conn, batch_size=1000):
+    """Replay the portfolios in the change log; returns the portfolioIDs changed.
+
+    Does nothing (and returns an empty set) until install() and
+    build_snapshots() have run. Runs in one transaction that locks the
+    SnapshotState row, so concurrent updaters take turns.
+    """
+    if not is_built(conn):
+        return set()
+    cur = conn.cursor()
+    try:
+        conn.start_transaction()
+        _lock_state(cur)
+        ids, changed = _read_changes(cur)
+        for pid, since in changed.items():
+            _replay_from(cur, pid, since, batch_size)
+        _delete_changes(cur, ids, batch_size)
+        conn.commit()
+        return set(changed)
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def build_snapshots(conn, batch_size=1000):
+    """Replay every portfolio from its first trade; returns the portfolioIDs built.
+
+    The tables must have been created by install(). The change log read
+    at the start is consumed, as the build covers it.
+    """
+    cur = conn.cursor()
+    try:
+        conn.start_transaction()
+        _lock_state(cur)
+        ids, _ = _read_changes(cur)
+        cur.execute("DELETE FROM PortfolioPositionDaily")
+        cur.execute("DELETE FROM PortfolioValueDaily")
+        cur.execute(FIRST_TRADES_SQL)
+        first = {pid: day or FIRST_DAY for pid, day in cur.fetchall() if pid is not None}
+        for pid, since in first.items():
+            _replay_from(cur, pid, since, batch_size)
+        _delete_changes(cur, ids, batch_size)
+        cur.execute("UPDATE SnapshotState SET builtAt = %s WHERE snapshot = %s",
+                    (datetime.now().replace(microsecond=0), SNAPSHOT))
+        conn.commit()
+        return set(first)
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rebuild", action="store_true",
+                    help="drop and reinstall the snapshot tables, then replay every trade")
+    args = ap.parse_args(argv)
+
+    from portfolio_gui import IMPORT_BATCH_SIZE, POOL
+
+    t0 = time.perf_counter()
+    with POOL.connection() as conn:
+        built = not args.rebuild and is_built(conn)
+        if built:
+            changed = update_snapshots(conn, batch_size=IMPORT_BATCH_SIZE)
+        else:
+            install(conn, reinstall=args.rebuild)
+            changed = build_snapshots(conn, batch_size=IMPORT_BATCH_SIZE)
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*), COUNT(DISTINCT portfolioID) FROM PortfolioValueDaily")
+        days, portfolios = cur.fetchall()[0]
+        cur.close()
+    what = (f"updated {len(changed):,} portfolios" if built and changed else
+            f"built for {len(changed):,} portfolios" if changed else "already up to date")
+    print(f"snapshots {what} in {time.perf_counter() - t0:.1f}s: "
+          f"{days:,} portfolio-days across {portfolios:,} portfolios")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+from tkinter import NO
+
+
+# =========================
+# TABLE BINDING
+# =========================
+
+class TableBinding:
+    """Keeps a Treeview in step with query results, touching only the rows that changed.
+
+    Rows are keyed by the `keys` columns (the primary key), and the key is
+    the row's Treeview item ID, so the selection and scroll position
+    survive a refresh. update(cols, rows) inserts new rows, rewrites
+    changed ones, moves reordered ones and deletes the rest; an unchanged
+    result costs no Tk calls. Columns and headings are only reconfigured
+    when the column list differs.
+
+    Without keys, or when the result lacks a key column, the whole row is
+    the key: a changed row is then deleted and inserted again.
+
+    Results that arrive in chunks are synced with begin(cols), feed(rows)
+    per chunk and end(); the rows shown before begin() stay until they are
+    replaced, so the first chunk appears right away.
+    """
+
+    def __init__(self, tree, keys=(), cols=None, width=120):
+        self.tree = tree
+        self.keys = list(keys)
+        self.width = width
+        self.cols = None
+        self.rows = {}          # iid -> row as shown
+        self._key_idx = None    # None: the whole row is the key
+        self._order = None      # iids in tree order while a sync runs
+        self._pos = 0
+        self._seen = {}         # key -> occurrences so far in this sync, for duplicate rows
+        self._detached = set()  # rows taken out of the way during a sync
+        self._counts = None
+        if cols is not None:    # the tree's columns are already set up
+            self.cols = list(cols)
+            self._key_idx = self._key_columns(self.cols)
+
+    # ---------- whole results ----------
+    def update(self, cols, rows):
+        """Show exactly `rows`; returns the counts of rows inserted, updated, moved and deleted."""
+        self.begin(cols)
+        self.feed(rows)
+        return self.end()
+
+    def clear(self):
+        self._order = None
+        self.tree.delete(*self.tree.get_children(), *self._detached)
+        self.rows.clear()
+        self._detached.clear()
+
+    # ---------- chunked sync ----------
+    def begin(self, cols):
+        """Start a sync against a result with columns `cols`."""
+        cols = list(cols)
+        if self._detached:  # left over from a sync that never ended
+            self.tree.delete(*self._detached)
+            for iid in self._detached:
+                del self.rows[iid]
+            self._detached.clear()
+        if cols != self.cols:
+            self.clear()
+            self._set_columns(cols)
+        self._order = list(self.tree.get_children())
+        self._pos = 0
+        self._seen = {}
+        self._counts = {"inserted": 0, "updated": 0, "moved": 0, "deleted": 0}
+
+    def feed(self, rows):
+        """Place the next rows of the result after the ones already fed."""
+        rows = [tuple(r) for r in rows]
+        iids = [self._iid(r) for r in rows]
+        ahead = set(iids)
+        order, counts = self._order, self._counts
+        for iid, row in zip(iids, rows):
+            p = self._pos
+            self._pos += 1
+            old = self.rows.get(iid)
+            if old is None:
+                self.tree.insert("", p, iid=iid, values=row)
+                order.insert(p, iid)
+                counts["inserted"] += 1
+            else:
+                if iid in self._detached:
+                    self.tree.move(iid, "", p)
+                    self._detached.discard(iid)
+                    order.insert(p, iid)
+                    counts["moved"] += 1
+                elif order[p] != iid:
+                    j = order.index(iid, p)
+                    between = order[p:j]
+                    if ahead.isdisjoint(between):
+                        # rows gone from the result (or due in a later chunk): one detach
+                        # instead of moving every following row up by one
+                        self.tree.detach(*between)
+                        self._detached.update(between)
+                        del order[p:j]
+                    else:
+                        self.tree.move(iid, "", p)
+                        order.pop(j)
+                        order.insert(p, iid)
+                        counts["moved"] += 1
+                if old != row:
+                    self.tree.item(iid, values=row)
+                    counts["updated"] += 1
+            self.rows[iid] = row
+
+    def end(self):
+        """Delete the rows the result no longer has; returns the sync's counts."""
+        stale = self._order[self._pos:] + list(self._detached)
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self.rows[iid]
+        self._detached.clear()
+        self._order = None
+        counts = self._counts
+        counts["deleted"] = len(stale)
+        return counts
+
+    # ---------- single rows ----------
+    def insert(self, index, row):
+        """Add one row at `index` without a sync; returns its iid (None if already shown)."""
+        row = tuple(row)
+        iid = self._iid(row, count=False)
+        if iid in self.rows:
+            return None
+        self.tree.insert("", index, iid=iid, values=row)
+        self.rows[iid] = row
+        return iid
+
+    def delete(self, *iids):
+        self.tree.delete(*iids)
+        for iid in iids:
+            del self.rows[iid]
+
+    def key(self, iid):
+        """Key columns of a shown row, as a tuple."""
+        return self.row_key(self.rows[iid])
+
+    def row_key(self, row):
+        return tuple(row) if self._key_idx is None else tuple(row[i] for i in self._key_idx)
+
+    def iid(self, row):
+        """Item ID a row gets (that of its first occurrence, if its key repeats)."""
+        return self._iid(tuple(row), count=False)
+
+    # ---------- internals ----------
+    def _iid(self, row, count=True):
+        key = row if self._key_idx is None else [row[i] for i in self._key_idx]
+        iid = str(key[0]) if len(key) == 1 else "\x1f".join(map(str, key))
+        if count:
+            n = self._seen.get(iid, 0)
+            self._seen[iid] = n + 1
+        else:
+            n = 0
+        return iid if n == 0 else f"{iid}\x1f#{n}"
+
+    def _key_columns(self, cols):
+        if self.keys and all(k in cols for k in self.keys):
+            return [cols.index(k) for k in self.keys]
+        return None
+
+    def _set_columns(self, cols):
+        self.cols = cols
+        self._key_idx = self._key_columns(cols)
+        self.tree["columns"] = cols
+        self.tree.column("#0", width=0, stretch=NO)
+        for c in cols:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=self.width)
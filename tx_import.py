@@ -0,0 +1,176 @@
+import csv
+import json
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from mysql.connector import errors
+
+
+# =========================
+# BULK TRANSACTION IMPORT
+# =========================
+
+COLUMNS = ("transactionID", "portfolioID", "tickerSymbol", "investmentType",
+           "marketPricePerShare", "salePricePerShare", "quantity", "transactionDate")
+
+INSERT_SQL = (
+    "INSERT INTO TransactionRecord (" + ", ".join(COLUMNS) + ") "
+    "VALUES (" + ",".join(["%s"] * len(COLUMNS)) + ")"
+)
+
+# errors caused by the data in a row; anything else (lost connection, ...) aborts the import
+ROW_ERRORS = (errors.IntegrityError, errors.DataError)
+
+
+class ImportReport:
+    """Running totals for one import; only the first `max_errors` row errors are kept."""
+
+    def __init__(self, max_errors=1000):
+        self.max_errors = max_errors
+        self.rows_read = 0
+        self.inserted = 0
+        self.error_count = 0
+        self.errors = []          # (line_no, message)
+        self.portfolios = set()   # portfolioIDs written to, for cache invalidation
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add_error(self, line_no, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_no, message))
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_sec(self):
+        return self.inserted / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.inserted:,} inserted, {self.error_count:,} errors, "
+                f"{self.rows_read:,} read in {self.elapsed:.1f}s "
+                f"({self.rows_per_sec:,.0f} rows/s)")
+
+
+def iter_records(path):
+    """Yield (line_no, record) from a .csv or .jsonl file, one line at a time.
+
+    CSV records are dicts keyed by the header row; JSON Lines records are
+    the raw line text and are decoded by parse_record().
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_no, line
+        else:
+            reader = csv.DictReader(f)
+            for rec in reader:
+                yield reader.line_num, rec
+
+
+def _field(rec, name, required=True):
+    v = rec.get(name)
+    if v is None or str(v).strip() == "":
+        if required:
+            raise ValueError(f"missing {name}")
+        return None
+    return str(v).strip()
+
+
+def _number(rec, name, conv, required=True):
+    v = _field(rec, name, required)
+    if v is None:
+        return None
+    try:
+        return conv(v)
+    except (ValueError, InvalidOperation):
+        raise ValueError(f"{name} is not a number: {v!r}")
+
+
+def parse_record(rec):
+    """Validate one input record and return its INSERT params; raises ValueError."""
+    if isinstance(rec, str):
+        rec = json.loads(rec)
+    if not isinstance(rec, dict):
+        raise ValueError("record is not an object")
+
+    tid = _number(rec, "transactionID", int)
+    pid = _number(rec, "portfolioID", int)
+    ticker = _field(rec, "tickerSymbol")
+    invtype = _field(rec, "investmentType")
+    mprice = _number(rec, "marketPricePerShare", Decimal)
+    sprice = _number(rec, "salePricePerShare", Decimal, required=False)
+    qty = _number(rec, "quantity", Decimal)
+    tdate = _field(rec, "transactionDate", required=False)
+
+    if mprice < 0 or (sprice is not None and sprice < 0):
+        raise ValueError("prices must not be negative")
+    if qty == 0:
+        raise ValueError("quantity must not be zero")
+    try:
+        # same default as the entry form's CURDATE()
+        tdate = date.fromisoformat(tdate) if tdate else date.today()
+    except ValueError:
+        raise ValueError(f"transactionDate is not YYYY-MM-DD: {tdate!r}")
+    return tid, pid, ticker, invtype, mprice, sprice, qty, tdate
+
+
+def write_batch(conn, batch, report):
+    """Insert one batch of (line_no, params) in its own transaction, isolating bad rows if it fails.
+
+    Rejected rows are added to report.errors under their line_no.
+    """
+    cur = conn.cursor()
+    try:
+        conn.start_transaction()
+        try:
+            cur.executemany(INSERT_SQL, [params for _, params in batch])
+            conn.commit()
+            report.inserted += len(batch)
+        except ROW_ERRORS:
+            conn.rollback()
+            # one bad row fails the whole multi-row INSERT: redo it row by row
+            conn.start_transaction()
+            for line_no, params in batch:
+                try:
+                    cur.execute(INSERT_SQL, params)
+                    report.inserted += 1
+                except ROW_ERRORS as e:
+                    report.add_error(line_no, e.msg)
+            conn.commit()
+        report.portfolios.update(params[1] for _, params in batch)
+    finally:
+        cur.close()
+
+
+def import_transactions(conn, path, batch_size=1000, on_progress=None):
+    """Stream a CSV/JSONL file into TransactionRecord with batched executemany.
+
+    Only one batch is held in memory at a time. Rows that fail validation
+    or are rejected by the server are recorded in the returned
+    ImportReport and skipped. on_progress(report) is called after every
+    batch, from the calling thread.
+    """
+    report = ImportReport()
+    batch = []
+    for line_no, rec in iter_records(path):
+        report.rows_read += 1
+        try:
+            batch.append((line_no, parse_record(rec)))
+        except ValueError as e:
+            report.add_error(line_no, str(e))
+        if len(batch) >= batch_size:
+            write_batch(conn, batch, report)
+            batch = []
+            if on_progress:
+                on_progress(report)
+    if batch:
+        write_batch(conn, batch, report)
+    report.finished = time.perf_counter()
+    if on_progress:
+        on_progress(report)
+    return report
@@ -0,0 +1,264 @@
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# =========================
+# DURABLE JOURNAL
+# =========================
+
+class JournalLocked(Exception):
+    """Another process has the journal open."""
+
+
+def _lock_exclusive(f):
+    """Lock an open file for this process; raises OSError if another process holds the lock."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+class Journal:
+    """Append-only JSON Lines file of records waiting to be written to the database.
+
+    append() fsyncs before it returns, so an acknowledged record survives
+    a crash or power loss. Lines are {"seq": n, "record": {...}} for a
+    record and {"done": [n, ...]} once records are in the database (or
+    rejected by it). Opening a journal replays it: records without a done
+    line are pending again. When nothing is pending the file is emptied.
+    A torn last line, left by a crash mid-append, is ignored.
+
+    Thread-safe. A journal is used by one process at a time: opening it
+    takes an exclusive lock on `path`.lock, held until close(), and raises
+    JournalLocked if another process holds it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = {}   # seq -> record, in append order
+        self._next_seq = 1
+        self._torn = False   # the file ends in a partial line
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._lock_file = open(path + ".lock", "a")
+        try:
+            _lock_exclusive(self._lock_file)
+        except OSError:
+            self._lock_file.close()
+            raise JournalLocked(f"{path} is in use by another process")
+        self._replay()
+        self._file = open(path, "a", encoding="utf-8")
+        if not self._pending:
+            self._file.truncate(0)
+        elif self._torn:
+            self._file.write("\n")  # so the next line does not run on from it
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                self._torn = not line.endswith("\n")
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn write
+                if "seq" in entry:
+                    self._pending[entry["seq"]] = entry["record"]
+                    self._next_seq = max(self._next_seq, entry["seq"] + 1)
+                else:
+                    for seq in entry.get("done", ()):
+                        self._pending.pop(seq, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def append(self, record):
+        """Durably add `record`; returns its sequence number."""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._write({"seq": seq, "record": record}, sync=True)
+            self._pending[seq] = record
+            return seq
+
+    def pending(self):
+        """[(seq, record)] not yet done, oldest first."""
+        with self._lock:
+            return list(self._pending.items())
+
+    def mark_done(self, seqs):
+        """Record that `seqs` reached the database; empties the file once nothing is pending."""
+        with self._lock:
+            for seq in seqs:
+                self._pending.pop(seq, None)
+            if self._pending:
+                # not fsynced: if it is lost, the records are written again and the
+                # database turns the copies down as duplicate keys
+                self._write({"done": list(seqs)}, sync=False)
+            else:
+                self._file.truncate(0)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._lock_file.close()  # releases the lock
+
+    def _write(self, entry, sync):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+
+# =========================
+# WRITE-BEHIND QUEUE
+# =========================
+
+class WriteBehindQueue:
+    """Acknowledges records as soon as they are journaled and writes them in the background.
+
+    put(record) appends to the Journal and returns; `delay_ms` later,
+    every pending record is handed to write(batch) on the executor under
+    `tab`, `batch_size` at a time, so entries made in quick succession
+    share one multi-row INSERT and one commit. write(batch) gets [(seq,
+    record)], commits, and returns [(seq, message)] for the records the
+    database rejected; those are dropped, not retried. Records arriving
+    during a flush go out with the next one.
+
+    If write() raises (lost connection, server gone), the batches already
+    committed are marked done and the rest stay in the journal; the flush
+    is retried after retry_ms, doubling up to max_retry_ms. Records left
+    from an earlier session are flushed by start().
+
+    on_status(text) reports the pending / flushed / rejected counts;
+    on_flushed(records, rejected) is called on the Tk thread after each
+    flush that wrote or rejected something, with the records written and
+    (record, message) pairs for the rejected ones.
+    """
+
+    def __init__(self, root, jobs, tab, journal, write, delay_ms=200, batch_size=1000,
+                 retry_ms=1000, max_retry_ms=30000, on_status=None, on_flushed=None):
+        self.root = root
+        self.jobs = jobs
+        self.tab = tab
+        self.journal = journal
+        self.write = write
+        self.delay_ms = delay_ms
+        self.batch_size = batch_size
+        self.retry_ms = retry_ms
+        self.max_retry_ms = max_retry_ms
+        self.on_status = on_status or (lambda text: None)
+        self.on_flushed = on_flushed or (lambda records, rejected: None)
+        self.flushed = 0
+        self.rejected = 0
+        self.error = None       # last flush error, until a flush succeeds
+        self._retry = 0         # current retry delay, 0 while healthy
+        self._after_id = None
+        self._in_flight = False
+        self._stopped = True
+
+    def start(self):
+        self._stopped = False
+        self._report()
+        if len(self.journal):
+            self._schedule(0)
+
+    def stop(self):
+        self._stopped = True
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def put(self, record):
+        """Journal `record` (fsynced) and schedule a flush; returns its sequence number."""
+        seq = self.journal.append(record)
+        if not self._retry:  # while retrying, the retry timer flushes it
+            self._schedule(self.delay_ms)
+        self._report()
+        return seq
+
+    def flush_now(self):
+        self._retry = 0
+        self._schedule(0)
+
+    def status(self):
+        parts = [f"{len(self.journal):,} pending", f"{self.flushed:,} flushed"]
+        if self.rejected:
+            parts.append(f"{self.rejected:,} rejected")
+        text = "Queue: " + ", ".join(parts)
+        if self.error is not None:
+            text += f" - retrying in {self._retry / 1000:g}s: {self.error}"
+        return text
+
+    # ---------- scheduling ----------
+    def _schedule(self, delay):
+        if self._stopped or self._in_flight:
+            return  # the running flush reschedules when it finishes
+        if self._after_id is not None:
+            if delay:
+                return  # keep the earlier flush, so steady typing still gets flushed
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(delay, self._flush)
+
+    def _flush(self):
+        self._after_id = None
+        entries = self.journal.pending()
+        if not entries or self._in_flight:
+            return
+        self._in_flight = True
+        self.jobs.submit(self.tab, self._write_all, entries,
+                         on_done=self._on_written, on_error=self._on_error)
+
+    def _report(self):
+        self.on_status(self.status())
+
+    # ---------- worker side ----------
+    def _write_all(self, entries):
+        """Write `entries` batch by batch; returns (records written, rejected, error)."""
+        records = dict(entries)
+        written, rejected = [], []
+        try:
+            for i in range(0, len(entries), self.batch_size):
+                batch = entries[i:i + self.batch_size]
+                bad = self.write(batch)
+                self.journal.mark_done([seq for seq, _ in batch])
+                refused = {seq for seq, _ in bad}
+                written.extend(r for seq, r in batch if seq not in refused)
+                rejected.extend((records[seq], msg) for seq, msg in bad)
+        except Exception as e:
+            return written, rejected, e
+        return written, rejected, None
+
+    # ---------- Tk-thread side ----------
+    def _on_written(self, result):
+        self._in_flight = False
+        written, rejected, error = result
+        self.flushed += len(written)
+        self.rejected += len(rejected)
+        if error is None:
+            self.error = None
+            self._retry = 0
+            if len(self.journal):  # arrived during the flush
+                self._schedule(self.delay_ms)
+        else:
+            self.error = error
+            self._retry = min(max(self._retry * 2, self.retry_ms), self.max_retry_ms)
+            self._schedule(self._retry)
+        self._report()
+        if written or rejected:
+            self.on_flushed(written, rejected)
+
+    def _on_error(self, error):
+        self._on_written(([], [], error))